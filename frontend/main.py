@@ -1,27 +1,40 @@
 from frontend.ui import ui
+from frontend.logging_config import setup_logging
 from dotenv import load_dotenv
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import gradio as gr
+import uvicorn
 import os
 import logging
 
 load_dotenv()
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO, 
-    # time in a human-readable format, the severity of the message, and the message content
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(), # display the logs in the console
-        logging.FileHandler("frontend.log") # saves the logs into a file
-    ]
-)
+# Setup logging: JSON lines written through a background queue, sampled per request
+setup_logging("frontend.log", level=os.getenv("LOG_LEVEL", "INFO"), sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "1.0")))
 
 logger = logging.getLogger(__name__)
 
 
+app = FastAPI()
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    """
+    Expose the frontend metrics in the Prometheus text format.
+
+    Returns:
+        Response: The current value of every metric.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 def main():
     logger.info("Starting the Multimodal Search UI...")
-    ui().launch(server_name=os.getenv("FRONTEND_HOST"), server_port=int(os.getenv("FRONTEND_PORT")))
+    # Serve the Gradio app and the /metrics endpoint from the same server
+    gr.mount_gradio_app(app, ui(), path="/")
+    uvicorn.run(app, host=os.getenv("FRONTEND_HOST"), port=int(os.getenv("FRONTEND_PORT")))
 
 
 if __name__ == "__main__":
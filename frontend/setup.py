@@ -10,6 +10,7 @@ setup(
         'gradio==6.2.0',
         'strands-agents==1.21.0',
         'python-dotenv==1.2.1',
+        'prometheus-client==0.23.1',
         'faster-whisper==1.2.1',
         'soundfile==0.12.1',
     ],
@@ -0,0 +1,121 @@
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import random
+
+# Strings longer than this are logged as their length only (e.g. base64 images)
+MAX_LOGGED_STRING_LENGTH = 128
+
+_sample_rate = 1.0
+_request_sampled: contextvars.ContextVar[bool] = contextvars.ContextVar("request_sampled", default=True)
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        # Structured fields passed with extra={"fields": {...}}
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredFormattingQueueHandler(QueueHandler):
+    """
+    Enqueue records unformatted, so that message interpolation and traceback
+    formatting happen in the listener thread rather than on the caller.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats the message and drops args and exc_info;
+        # a shallow copy keeps them for the listener's formatter.
+        return copy.copy(record)
+
+
+class RequestSampler(logging.Filter):
+    """Drop the records of unsampled requests. Warnings and errors are always kept."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or _request_sampled.get()
+
+
+def start_request_sampling() -> bool:
+    """
+    Decide whether the logs of the current request are kept, according to the sample rate.
+
+    Call it at the start of each request; the decision applies to every record logged
+    from the same context (including worker threads started with asyncio.to_thread).
+
+    Returns:
+        bool: True if the request is sampled.
+    """
+    sampled = _sample_rate >= 1.0 or random.random() < _sample_rate
+    _request_sampled.set(sampled)
+    return sampled
+
+
+def summarize_payload(value: Any) -> Any:
+    """
+    Replace large payloads with their size so they can be logged cheaply.
+
+    Args:
+        value (Any): The payload to summarize (e.g. tool arguments).
+
+    Returns:
+        Any: The payload with long strings replaced by '<str len=N>' and lists by their length.
+    """
+    if isinstance(value, str):
+        return value if len(value) <= MAX_LOGGED_STRING_LENGTH else f"<str len={len(value)}>"
+    if isinstance(value, dict):
+        return {key: summarize_payload(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    return value
+
+
+def setup_logging(log_file: str, level: str = "INFO", sample_rate: float = 1.0) -> QueueListener:
+    """
+    Configure the root logger to emit JSON lines to the console and a file through a non-blocking queue.
+
+    Callers only enqueue records; formatting and disk I/O happen in a background listener thread.
+
+    Args:
+        log_file (str): The path of the log file.
+        level (str): The minimum log level.
+        sample_rate (float): The fraction of requests whose INFO/DEBUG records are kept.
+
+    Returns:
+        QueueListener: The started listener, stopped automatically at exit.
+    """
+    global _sample_rate
+    _sample_rate = sample_rate
+
+    formatter = JsonFormatter()
+    stream_handler = logging.StreamHandler()  # display the logs in the console
+    file_handler = logging.FileHandler(log_file)  # saves the logs into a file
+    for handler in (stream_handler, file_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredFormattingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestSampler())
+    listener = QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+    return listener
@@ -3,9 +3,13 @@ from mcp.client.streamable_http import streamable_http_client
 from strands.tools.mcp import MCPClient
 from strands.tools.mcp.mcp_types import MCPToolResult
 from frontend.utils import base64_to_pil_image
+from frontend.logging_config import summarize_payload
+from frontend.resilience import CircuitBreaker, CircuitOpenError, Deadline, ResultCache, ToolCallError, backoff_delay
+from datetime import timedelta
 from typing import Any
 import uuid
 import os
+import time
 import logging
 from dotenv import load_dotenv
 
@@ -13,19 +17,34 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Search tools can be retried safely
+IDEMPOTENT_TOOLS = {"text_to_image_search_tool", "image_to_image_search_tool", "hybrid_search_tool", "multimodal_fusion_search_tool"}
+
+# Prefix of the error results built by MCPClient when the call itself failed (connection, timeout),
+# as opposed to errors reported by the tool on the server
+TRANSPORT_ERROR_PREFIX = "Tool execution failed"
+
+# Shared by every request of the frontend process
+circuit_breaker = CircuitBreaker(failure_threshold=int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5")),
+                                 reset_timeout=float(os.getenv("CIRCUIT_BREAKER_RESET_SECONDS", "30")))
+fallback_cache = ResultCache(max_entries=int(os.getenv("FALLBACK_CACHE_MAX_ENTRIES", "64")))
+
 
 class MultimodalSearchMCPClient:
     
     @staticmethod
-    def create_mcp_client() -> MCPClient:
+    def create_mcp_client(startup_timeout: int = 30) -> MCPClient:
         """
         Creates and returns an MCPClient instance.
 
+        Args:
+            startup_timeout (int): The maximum time in seconds to wait for the session to start.
+
         Returns:
             MCPClient: An instance of MCPClient connected to the specified MCP server.
         """
         logger.info("Creating MCPClient instance")
-        return MCPClient(lambda: streamable_http_client(os.getenv("MCP_SERVER_URL")))
+        return MCPClient(lambda: streamable_http_client(os.getenv("MCP_SERVER_URL")), startup_timeout=startup_timeout)
     
     @staticmethod
     def get_tools(mcp_client: MCPClient) -> list[str]:
@@ -42,7 +61,7 @@ class MultimodalSearchMCPClient:
         return [tool.tool_name for tool in mcp_client.list_tools_sync()]
     
     @staticmethod
-    def invoke_tool(mcp_client: MCPClient,tool_name: str, arguments: dict[str, Any])-> MCPToolResult:
+    def invoke_tool(mcp_client: MCPClient,tool_name: str, arguments: dict[str, Any], deadline: Deadline | None = None)-> MCPToolResult:
         
         """
         Calls a tool on the MCPClient with the given arguments.
@@ -51,12 +70,82 @@ class MultimodalSearchMCPClient:
             mcp_client (MCPClient): The MCPClient instance to use.
             tool_name (str): The name of the tool to call.
             arguments (dict[str, Any]): The arguments to pass to the tool.
+            deadline (Deadline | None): If given, the call times out when the deadline expires.
 
         Returns:
             dict: The response from the MCPClient.
         """
-        logger.info("Calling tool '%s' on MCPClient with arguments: %s", tool_name, arguments)
-        return mcp_client.call_tool_sync(tool_use_id=str(uuid.uuid4()), name=tool_name, arguments=arguments)
+        logger.info("Calling tool '%s' on MCPClient", tool_name, extra={"fields": {"tool": tool_name, "arguments": summarize_payload(arguments)}})
+        read_timeout = timedelta(seconds=deadline.remaining()) if deadline is not None else None
+        return mcp_client.call_tool_sync(tool_use_id=str(uuid.uuid4()), name=tool_name, arguments=arguments, read_timeout_seconds=read_timeout)
+
+    @staticmethod
+    def search(tool_name: str, arguments: dict[str, Any], deadline: Deadline) -> MCPToolResult:
+        """
+        Calls a search tool within the deadline, with bounded retries and a circuit breaker.
+
+        Transport errors, timeouts and empty results (the server tools return [] when ChromaDB
+        fails) of idempotent tools are retried with exponential backoff and jitter while time
+        is left, and count as a failure for the circuit breaker. Errors reported by the tool
+        itself are not retried. Only non-empty results are cached. The circuit breaker is
+        consulted, and updated, once per call rather than once per attempt.
+        When the backend is unhealthy (circuit open, deadline exceeded or every attempt failed),
+        the last successful result of the same call is served as a degraded fallback.
+
+        Args:
+            tool_name (str): The name of the tool to call.
+            arguments (dict[str, Any]): The arguments to pass to the tool.
+            deadline (Deadline): The time budget of the request.
+
+        Returns:
+            MCPToolResult: The (possibly cached) successful response.
+
+        Raises:
+            ToolCallError: If the tool reported an error.
+            Exception: The last error if the call failed and no cached result exists.
+        """
+        key = ResultCache.key(tool_name, arguments)
+        max_attempts = int(os.getenv("MCP_MAX_ATTEMPTS", "3")) if tool_name in IDEMPOTENT_TOOLS else 1
+
+        if deadline.expired():
+            error: Exception = TimeoutError(f"Deadline exceeded before calling tool '{tool_name}'")
+        elif not circuit_breaker.allow_request():
+            error = CircuitOpenError(f"Circuit breaker open, tool '{tool_name}' not called")
+        else:
+            for attempt in range(max_attempts):
+                if attempt > 0 and deadline.expired():
+                    break
+                try:
+                    client = MultimodalSearchMCPClient.create_mcp_client(startup_timeout=max(1, int(deadline.remaining())))
+                    with client:
+                        result = MultimodalSearchMCPClient.invoke_tool(client, tool_name, arguments, deadline)
+                except Exception as e:
+                    error = e
+                else:
+                    if result["status"] == "success" and (result.get("structuredContent") or {}).get("result"):
+                        circuit_breaker.record_success()
+                        fallback_cache.put(key, result)
+                        return result
+                    if result["status"] == "success":
+                        # The search tools answer [] when ChromaDB fails: a failed attempt, not a result to cache
+                        error = RuntimeError(f"Tool '{tool_name}' returned no results")
+                    else:
+                        message = " ".join(item.get("text", "") for item in result["content"])
+                        if not message.startswith(TRANSPORT_ERROR_PREFIX):
+                            # The server answered: it is healthy, but the same call would fail again
+                            circuit_breaker.record_success()
+                            raise ToolCallError(f"Tool '{tool_name}' failed: {message}")
+                        error = RuntimeError(message)
+                logger.warning("Attempt %d/%d of tool '%s' failed: %s", attempt + 1, max_attempts, tool_name, error)
+                if attempt + 1 < max_attempts:
+                    time.sleep(min(backoff_delay(attempt, base_delay=0.1, max_delay=1.0), deadline.remaining()))
+            circuit_breaker.record_failure()
+
+        cached = fallback_cache.get(key)
+        if cached is not None:
+            logger.warning("Serving cached results for tool '%s' (degraded mode): %s", tool_name, error)
+            return cached
+        raise error
 
     @staticmethod
     def get_items_gallery(result:MCPToolResult)-> list:
@@ -64,7 +153,9 @@ class MultimodalSearchMCPClient:
         """
         Transforms the given MCPToolResult into a list of gallery items.
 
-        Each item in the list is a tuple containing a PIL image and a caption string.
+        Each item in the list is a tuple containing an image and a caption string. The image is
+        the URL served by the MCP server when the tool returns 'image_url', so the browser can
+        cache it; otherwise the inline base64 image is decoded into a PIL image.
 
         The caption string is formatted as follows: "{name} — ${price} — {category}"
 
@@ -86,8 +177,10 @@ class MultimodalSearchMCPClient:
                 
                 meta = item["metadata"]
                 caption = f"{meta['name']} — ${meta['price']} — {meta['category']}"
-                base64_img = meta['base64_image']
-                image= base64_to_pil_image(base64_img)
+                if "image_url" in item:
+                    image = item["image_url"]
+                else:
+                    image = base64_to_pil_image(meta['base64_image'])
                 gallery_items.append([image, caption])
             logger.info("Successfully created %d gallery items", len(gallery_items))
             return gallery_items
@@ -1,8 +1,93 @@
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator
 import time
 import logging
+from prometheus_client import Counter, Gauge, Histogram
 
 logger = logging.getLogger(__name__)
 
+# The MCP server exposes the same metric names with service="mcp_server"
+SERVICE = "frontend"
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_LATENCY = Histogram("search_request_latency_seconds", "End-to-end latency of a search request.",
+                            ["service", "tool"], buckets=LATENCY_BUCKETS)
+STAGE_LATENCY = Histogram("search_stage_latency_seconds", "Latency of each stage of a search request.",
+                          ["service", "tool", "stage"], buckets=LATENCY_BUCKETS)
+ERRORS = Counter("search_errors", "Search requests that failed.", ["service", "tool"])
+IN_FLIGHT = Gauge("search_in_flight_requests", "Search requests currently being processed.", ["service", "tool"])
+POOL_SIZE = Gauge("worker_pool_size", "Maximum number of worker threads of a pool.", ["service", "pool"])
+POOL_BUSY = Gauge("worker_pool_busy", "Tasks currently running in a worker pool.", ["service", "pool"])
+POOL_QUEUED = Gauge("worker_pool_queued", "Tasks waiting for a free worker of a pool.", ["service", "pool"])
+
+
+@contextmanager
+def track_request(tool: str) -> Iterator[None]:
+    """
+    Measure the latency of a whole search request and count it as in flight while it runs.
+
+    Args:
+        tool (str): The kind of query (audio, text, image).
+    """
+    in_flight = IN_FLIGHT.labels(SERVICE, tool)
+    in_flight.inc()
+    start_time = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.labels(SERVICE, tool).inc()
+        raise
+    finally:
+        REQUEST_LATENCY.labels(SERVICE, tool).observe(time.perf_counter() - start_time)
+        in_flight.dec()
+
+
+def record_error(tool: str) -> None:
+    """
+    Count a failed search request that was handled without raising.
+
+    Args:
+        tool (str): The kind of query (audio, text, image).
+    """
+    ERRORS.labels(SERVICE, tool).inc()
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor exposing its size, busy and queued tasks as worker_pool_* gauges."""
+
+    def __init__(self, pool: str, max_workers: int, thread_name_prefix: str = ""):
+        """
+        Initialize the InstrumentedThreadPoolExecutor object.
+
+        Args:
+            pool (str): The name of the pool, used to label the metrics.
+            max_workers (int): The maximum number of worker threads.
+            thread_name_prefix (str): The name prefix of the worker threads.
+        """
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        POOL_SIZE.labels(SERVICE, pool).set(max_workers)
+        self._busy = POOL_BUSY.labels(SERVICE, pool)
+        self._queued = POOL_QUEUED.labels(SERVICE, pool)
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        self._queued.inc()
+
+        def run() -> Any:
+            self._queued.dec()
+            self._busy.inc()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._busy.dec()
+
+        future = super().submit(run)
+        # A task cancelled while queued never runs
+        future.add_done_callback(lambda done: self._queued.dec() if done.cancelled() else None)
+        return future
+
+
 class Metrics:
     
     def __init__(self):
@@ -11,6 +96,18 @@ class Metrics:
         self.post_processing_latency = 0.0
     
     
+    def publish(self, tool: str) -> None:
+        """
+        Add the latencies of this request to the aggregated stage histograms.
+
+        Args:
+            tool (str): The kind of query (audio, text, image).
+        """
+        if self.trascription_latency:
+            STAGE_LATENCY.labels(SERVICE, tool, "transcribe").observe(self.trascription_latency)
+        STAGE_LATENCY.labels(SERVICE, tool, "mcp_tool").observe(self.mcp_tool_latency)
+        STAGE_LATENCY.labels(SERVICE, tool, "gallery_postprocess").observe(self.post_processing_latency)
+
     def get_total_latency(self) -> float:
         """
         Returns the total latency of the system in seconds, rounded to 3 decimal places.
@@ -0,0 +1,184 @@
+from collections import OrderedDict
+from typing import Any, Optional
+import hashlib
+import json
+import random
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+
+class ToolCallError(Exception):
+    """Raised when the MCP server answered with a tool or validation error, which a retry would not fix."""
+
+
+class Deadline:
+    """Absolute time budget of a request, propagated from the UI down to the MCP call."""
+
+    def __init__(self, seconds: float):
+        """
+        Initialize the Deadline object.
+
+        Args:
+            seconds (float): The time budget from now, in seconds.
+        """
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """
+        Returns the time left before the deadline, in seconds (0.0 once expired).
+
+        Returns:
+            float: The remaining time in seconds.
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """
+        Returns whether the deadline has passed.
+
+        Returns:
+            bool: True if no time is left.
+        """
+        return self.remaining() == 0.0
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the backend is unhealthy.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls are
+    rejected for `reset_timeout` seconds. Then a single trial call is let through
+    (half-open): a success closes the circuit, a failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        Initialize the CircuitBreaker object.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds the circuit stays open before a trial call.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Returns whether a call may be attempted now.
+
+        Returns:
+            bool: False while the circuit is open.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            # Half-open: let one trial call through
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit breaker closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit once the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Circuit breaker opened after %d consecutive failures", self._failures)
+                self._opened_at = time.monotonic()
+
+
+class ResultCache:
+    """Bounded LRU cache of the last successful result of each call, served when the backend is unavailable."""
+
+    def __init__(self, max_entries: int):
+        """
+        Initialize the ResultCache object.
+
+        Args:
+            max_entries (int): The maximum number of cached results.
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(tool_name: str, arguments: dict[str, Any]) -> str:
+        """
+        Build a compact cache key from a tool call (base64 images are hashed rather than stored).
+
+        Args:
+            tool_name (str): The name of the tool.
+            arguments (dict[str, Any]): The arguments of the tool.
+
+        Returns:
+            str: The cache key.
+        """
+        payload = json.dumps([tool_name, arguments], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the cached result for a key, or None.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Any: The cached result, or None if missing.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: str, result: Any) -> None:
+        """
+        Cache a result, evicting the least recently used one if full.
+
+        Args:
+            key (str): The cache key.
+            result (Any): The result to cache.
+        """
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt (int): The number of the failed attempt, starting at 0.
+        base_delay (float): The delay cap of the first retry, in seconds.
+        max_delay (float): The maximum delay, in seconds.
+
+    Returns:
+        float: A random delay in seconds.
+    """
+    return random.uniform(0.0, min(max_delay, base_delay * 2 ** attempt))
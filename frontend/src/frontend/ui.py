@@ -2,13 +2,24 @@ import gradio as gr
 import soundfile as sf
 from frontend.mcp_client import MultimodalSearchMCPClient
 from frontend.stt import SpeechToTextProcessor
-from frontend.metrics import Metrics
+from frontend.metrics import InstrumentedThreadPoolExecutor, Metrics, track_request, record_error
 from frontend.utils import image_to_base64
+from frontend.logging_config import start_request_sampling
+from frontend.resilience import Deadline
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
-def process_audio_query(audio_query_file_path: str, top_k: int) -> tuple[list, str, float, float, float, float]:
+# Searches run on this pool instead of directly on the Gradio event workers, so that busy and
+# queued searches show up in the worker_pool_* metrics. One worker by default, like Gradio's
+# default concurrency limit.
+search_workers = int(os.getenv("FRONTEND_SEARCH_WORKERS", "1"))
+search_executor = InstrumentedThreadPoolExecutor("search", max_workers=search_workers, thread_name_prefix="search")
+# Transcription and image encoding of fusion queries, two tasks per search
+fusion_executor = InstrumentedThreadPoolExecutor("fusion_preprocess", max_workers=2 * search_workers, thread_name_prefix="fusion")
+
+def process_audio_query(audio_query_file_path: str, top_k: int, deadline: Deadline) -> tuple[list, str, float, float, float, float]:
     """
     Process an audio query using the SpeechToTextProcessor and
     MultimodalSearchMCPClient and retrieve the gallery items.
@@ -16,6 +27,7 @@ def process_audio_query(audio_query_file_path: str, top_k: int) -> tuple[list, s
     Args:
         audio_query_file_path (str): The path to the audio query file.
         top_k (int): The number of top results to retrieve.
+        deadline (Deadline): The time budget of the request.
 
     Returns:
         tuple[list, str, float, float, float, float]: A tuple containing
@@ -36,22 +48,22 @@ def process_audio_query(audio_query_file_path: str, top_k: int) -> tuple[list, s
         raise gr.Error(f"{ge}")
     
     try:  
-        client = MultimodalSearchMCPClient.create_mcp_client()
-        with client:
-            start_time = metrics.start_timer()  
-            tool_result = MultimodalSearchMCPClient.invoke_tool(client,tool_name="text_to_image_search_tool", arguments={"text_query": text_query, "top_k": top_k})
-            metrics.mcp_tool_latency = metrics.end_timer(start_time)
-
-            start_time = metrics.start_timer()
-            gallery_items = MultimodalSearchMCPClient.get_items_gallery(tool_result)
-            metrics.post_processing_latency = metrics.end_timer(start_time)
+        start_time = metrics.start_timer()  
+        tool_result = MultimodalSearchMCPClient.search(tool_name="text_to_image_search_tool", arguments={"text_query": text_query, "top_k": top_k}, deadline=deadline)
+        metrics.mcp_tool_latency = metrics.end_timer(start_time)
+
+        start_time = metrics.start_timer()
+        gallery_items = MultimodalSearchMCPClient.get_items_gallery(tool_result)
+        metrics.post_processing_latency = metrics.end_timer(start_time)
+        metrics.publish("audio")
         return gallery_items, text_query, metrics.trascription_latency, metrics.mcp_tool_latency, metrics.post_processing_latency, metrics.get_total_latency()
     except Exception as e:
+        record_error("audio")
         logger.error(f"Error processing audio query: {e}")
         return [], "", 0.0, 0.0, 0.0, 0.0
 
 
-def process_text_query(text_query: str, top_k: int)-> tuple[list, str, float, float, float, float]:
+def process_text_query(text_query: str, top_k: int, deadline: Deadline)-> tuple[list, str, float, float, float, float]:
     """
     Process a text query using the MultimodalSearchMCPClient and
     retrieve the gallery items.
@@ -59,6 +71,7 @@ def process_text_query(text_query: str, top_k: int)-> tuple[list, str, float, fl
     Args:
         text_query (str): The text query to process.
         top_k (int): The number of top results to retrieve.
+        deadline (Deadline): The time budget of the request.
     Returns:
         tuple[list, str, float, float, float, float]: A tuple containing
         the gallery items, the text query, the transcription latency,
@@ -69,22 +82,22 @@ def process_text_query(text_query: str, top_k: int)-> tuple[list, str, float, fl
         metrics = Metrics()  # Creamos la instancia de la clase Metrics
 
         
-        client = MultimodalSearchMCPClient.create_mcp_client()
-        with client:
-            start_time = metrics.start_timer()  
-            tool_result = MultimodalSearchMCPClient.invoke_tool(client, tool_name="text_to_image_search_tool", arguments={"text_query": text_query, "top_k": top_k})
-            metrics.mcp_tool_latency = metrics.end_timer(start_time)
+        start_time = metrics.start_timer()  
+        tool_result = MultimodalSearchMCPClient.search(tool_name="text_to_image_search_tool", arguments={"text_query": text_query, "top_k": top_k}, deadline=deadline)
+        metrics.mcp_tool_latency = metrics.end_timer(start_time)
 
-            start_time = metrics.start_timer()  
-            gallery_items = MultimodalSearchMCPClient.get_items_gallery(tool_result)
-            metrics.post_processing_latency = metrics.end_timer(start_time)
+        start_time = metrics.start_timer()  
+        gallery_items = MultimodalSearchMCPClient.get_items_gallery(tool_result)
+        metrics.post_processing_latency = metrics.end_timer(start_time)
 
-            return gallery_items,"", metrics.trascription_latency, metrics.mcp_tool_latency, metrics.post_processing_latency, metrics.get_total_latency()
+        metrics.publish("text")
+        return gallery_items,"", metrics.trascription_latency, metrics.mcp_tool_latency, metrics.post_processing_latency, metrics.get_total_latency()
     except Exception as e:
+        record_error("text")
         logger.error(f"Error processing text query: {e}")
         return [], "", 0.0, 0.0, 0.0, 0.0
 
-def process_image_query(image_query_file_path: str, top_k: int) -> tuple[list, str, float, float, float, float]:
+def process_image_query(image_query_file_path: str, top_k: int, deadline: Deadline) -> tuple[list, str, float, float, float, float]:
     """
     Process an image query using the MultimodalSearchMCPClient and
     retrieve the gallery items.
@@ -92,6 +105,7 @@ def process_image_query(image_query_file_path: str, top_k: int) -> tuple[list, s
     Args:
         image_query (str): The path to the image query file.
         top_k (int): The number of top results to retrieve.
+        deadline (Deadline): The time budget of the request.
 
     Returns:
         tuple[list, str, float, float, float, float]: A tuple containing
@@ -106,21 +120,74 @@ def process_image_query(image_query_file_path: str, top_k: int) -> tuple[list, s
 
         metrics = Metrics()  
          
-        client = MultimodalSearchMCPClient.create_mcp_client()
-        with client:
-            start_time = metrics.start_timer()  
-            tool_result = MultimodalSearchMCPClient.invoke_tool(client,tool_name="image_to_image_search_tool", arguments={"image_query": image_query, "top_k": top_k})
-            metrics.mcp_tool_latency = metrics.end_timer(start_time)
-
-            start_time = metrics.start_timer()
-            gallery_items = MultimodalSearchMCPClient.get_items_gallery(tool_result)
-            metrics.post_processing_latency = metrics.end_timer(start_time)
-            return gallery_items,"", metrics.trascription_latency, metrics.mcp_tool_latency, metrics.post_processing_latency, metrics.get_total_latency()
+        start_time = metrics.start_timer()  
+        tool_result = MultimodalSearchMCPClient.search(tool_name="image_to_image_search_tool", arguments={"image_query": image_query, "top_k": top_k}, deadline=deadline)
+        metrics.mcp_tool_latency = metrics.end_timer(start_time)
+
+        start_time = metrics.start_timer()
+        gallery_items = MultimodalSearchMCPClient.get_items_gallery(tool_result)
+        metrics.post_processing_latency = metrics.end_timer(start_time)
+        metrics.publish("image")
+        return gallery_items,"", metrics.trascription_latency, metrics.mcp_tool_latency, metrics.post_processing_latency, metrics.get_total_latency()
     except Exception as e:
+        record_error("image")
         logger.error(f"Error processing image query: {e}")
         return [], "", 0.0, 0.0, 0.0, 0.0
 
 
+def process_fusion_query(audio_query_file_path: str, text_query: str, image_query_file_path: str, top_k: int, deadline: Deadline) -> tuple[list, str, float, float, float, float]:
+    """
+    Process several queries of different modalities at once with the multimodal fusion search tool.
+
+    The audio transcription and the image preprocessing run concurrently, so the latency
+    before the MCP call is that of the slowest branch rather than their sum.
+
+    Args:
+        audio_query_file_path (str): The path to the audio query file, or None.
+        text_query (str): The text query, or an empty string.
+        image_query_file_path (str): The path to the image query file, or None.
+        top_k (int): The number of top results to retrieve.
+        deadline (Deadline): The time budget of the request.
+
+    Returns:
+        tuple[list, str, float, float, float, float]: A tuple containing
+        the gallery items, the transcribed text, the transcription latency,
+        the MCP tool latency, the post-processing latency, and the total latency.
+    """
+    logger.info("Processing fusion query.")
+    metrics = Metrics()
+
+    start_time = metrics.start_timer()
+    transcription = fusion_executor.submit(lambda: SpeechToTextProcessor().transcribe(audio_query_file_path)) if audio_query_file_path else None
+    image_query = fusion_executor.submit(image_to_base64, image_query_file_path) if image_query_file_path else None
+    try:
+        transcribed_text = transcription.result() if transcription else ""
+    except Exception as ge:
+        logger.error("Error during speech-to-text transcription: %s", ge)
+        raise gr.Error(f"{ge}")
+    image_queries = [image_query.result()] if image_query else []
+    if audio_query_file_path:
+        metrics.trascription_latency = metrics.end_timer(start_time)
+
+    try:
+        text_queries = [query for query in (text_query, transcribed_text) if query]
+        arguments = {"text_queries": text_queries, "image_queries": image_queries, "top_k": top_k, "mode": os.getenv("FUSION_MODE", "embedding")}
+
+        start_time = metrics.start_timer()
+        tool_result = MultimodalSearchMCPClient.search(tool_name="multimodal_fusion_search_tool", arguments=arguments, deadline=deadline)
+        metrics.mcp_tool_latency = metrics.end_timer(start_time)
+
+        start_time = metrics.start_timer()
+        gallery_items = MultimodalSearchMCPClient.get_items_gallery(tool_result)
+        metrics.post_processing_latency = metrics.end_timer(start_time)
+        metrics.publish("fusion")
+        return gallery_items, transcribed_text, metrics.trascription_latency, metrics.mcp_tool_latency, metrics.post_processing_latency, metrics.get_total_latency()
+    except Exception as e:
+        record_error("fusion")
+        logger.error(f"Error processing fusion query: {e}")
+        return [], "", 0.0, 0.0, 0.0, 0.0
+
+
 def get_audio_duration(audio_query_file_path: str) -> float:
     """ Get the duration of the audio file.
     
@@ -157,18 +224,19 @@ def validate_audio_duration(duration: float, min_seconds: float = 1.0) -> None:
         raise gr.Error(f"❌ Error: - Audio too short ({duration:.2f}s). Please speak for at least {min_seconds:.2f}s.")
     
 
-def validate_single_query(*queries) -> None:
+def validate_query(*queries) -> int:
     """
-    Validate that the user has provided only one query (text, image, or audio).
-    - If all files are empty, raise an Error.    
-    - If more than one file is filled, raise an Error.
+    Validate that the user has provided at least one query (text, image, or audio).
+    Several queries are combined with a fusion search.
 
     Args:
         *queries: The queries to validate.
 
+    Returns:
+        int: The number of queries provided.
+
     Raises:
         gr.Error: If the user has not provided any query.
-        gr.Error: If the user has provided more than one query.
 
     """
     count = sum(bool(q) for q in queries)
@@ -176,13 +244,14 @@ def validate_single_query(*queries) -> None:
     if count == 0:
         raise gr.Error("❌ Error: Please provide at least one query (text, image, or audio).")
 
-    if count > 1:
-        raise gr.Error("❌ Error: Please provide only one query (text, image, or audio). Do not fill more than one field.")
+    return count
 
 
 def update_ui(audio_query_file_path: str, text_query: str, image_query_file_path: str, top_k: int) -> tuple[list, str, float, float, float, float]:
     """
-    Processes an audio/text/image query and returns the gallery items.
+    Processes an audio/text/image query, or a fusion of several of them, and returns the gallery items.
+
+    The search runs on the search worker pool; time spent waiting for a free worker counts against the deadline.
 
     Args:
         audio_query_file_path (str): The path to the audio query file.
@@ -195,21 +264,50 @@ def update_ui(audio_query_file_path: str, text_query: str, image_query_file_path
         the gallery items, the text query, the transcription latency,
         the MCP tool latency, the post-processing latency, and the total latency.
     """
+    # Time budget of the whole request, including transcription, propagated down to the MCP call
+    deadline = Deadline(float(os.getenv("SEARCH_DEADLINE_SECONDS", "15")))
+    return search_executor.submit(run_search, audio_query_file_path, text_query, image_query_file_path, top_k, deadline).result()
 
-    validate_single_query(audio_query_file_path, text_query, image_query_file_path)
+
+def run_search(audio_query_file_path: str, text_query: str, image_query_file_path: str, top_k: int, deadline: Deadline) -> tuple[list, str, float, float, float, float]:
+    """
+    Worker side of `update_ui`: validates the query and routes it by modality.
+
+    Args:
+        audio_query_file_path (str): The path to the audio query file.
+        text_query (str): The text query.
+        image_query_file_path (str): The path to the image query file.
+        top_k (int): The number of top results to retrieve.
+        deadline (Deadline): The time budget of the request.
+
+    Returns:
+        tuple[list, str, float, float, float, float]: See `update_ui`.
+    """
+    start_request_sampling()
+    count = validate_query(audio_query_file_path, text_query, image_query_file_path)
 
     if audio_query_file_path:
         duration = get_audio_duration(audio_query_file_path)
         validate_audio_duration(duration, min_seconds=1.0)
+
+    if count > 1:
+        logger.info("Processing fusion query...")
+        with track_request("fusion"):
+            return process_fusion_query(audio_query_file_path, text_query, image_query_file_path, top_k, deadline)
+
+    elif audio_query_file_path:
         logger.info("Processing audio query...")
-        return process_audio_query(audio_query_file_path, top_k)
+        with track_request("audio"):
+            return process_audio_query(audio_query_file_path, top_k, deadline)
         
     elif text_query:
         logger.info("Processing text query...")
-        return process_text_query(text_query, top_k)
+        with track_request("text"):
+            return process_text_query(text_query, top_k, deadline)
     else:
         logger.info("Processing image query...")
-        return process_image_query(image_query_file_path, top_k)
+        with track_request("image"):
+            return process_image_query(image_query_file_path, top_k, deadline)
 
 def ui()-> gr.Blocks:
 
@@ -236,7 +334,7 @@ def ui()-> gr.Blocks:
                                     Multimodal Search
                                 </h2> 
                                 <h3 style="margin:0px 0; font-family:Arial, sans-serif; color:#9E9E9E;"> 
-                                    Text2Img · Img2Img · Audio2Img
+                                    Text2Img · Img2Img · Audio2Img · Fusion
                                 </h3>
                                 <p style="margin:3px 0; font-size:12px; font-family:Arial, sans-serif; color:#555;">
                                     Direct Tool Invocation | MCP Protocol | MCP Architecture
@@ -322,8 +420,9 @@ def ui()-> gr.Blocks:
         btn_search.click(
             fn=update_ui,
             inputs=[audio_query,text_query,image_query, top_k],
-            outputs=[gallery, transcribed_text, transcribe_latency, result_invoke_tool_latency, postprocess_latency, total_latency]
-            
+            outputs=[gallery, transcribed_text, transcribe_latency, result_invoke_tool_latency, postprocess_latency, total_latency],
+            # Concurrency is bounded by the search worker pool (FRONTEND_SEARCH_WORKERS), where queued searches are measured
+            concurrency_limit=None,
         )
 
         btn_clear.click(
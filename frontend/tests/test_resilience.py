@@ -0,0 +1,73 @@
+import time
+from frontend.resilience import CircuitBreaker, Deadline, ResultCache, backoff_delay
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow_request()
+
+
+def test_half_open_lets_a_single_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow_request()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_successful_trial_closes_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+
+def test_deadline():
+    assert not Deadline(60).expired()
+    deadline = Deadline(0)
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_result_cache_key_ignores_argument_order():
+    assert ResultCache.key("tool", {"a": 1, "b": 2}) == ResultCache.key("tool", {"b": 2, "a": 1})
+    assert ResultCache.key("tool", {"a": 1}) != ResultCache.key("other_tool", {"a": 1})
+
+
+def test_backoff_delay_is_capped():
+    for attempt in range(10):
+        assert 0.0 <= backoff_delay(attempt, base_delay=0.1, max_delay=1.0) <= min(1.0, 0.1 * 2 ** attempt)
@@ -0,0 +1,61 @@
+from mcp_server.db import create_chroma_database
+from mcp_server.suggestions import QuerySuggestionIndex
+from typing import Iterator
+import itertools
+import logging
+import os
+from dotenv import load_dotenv
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+logger = logging.getLogger(__name__)
+
+
+load_dotenv()
+
+
+def read_popular_queries(path: str) -> list[str]:
+    """
+    Read the list of popular queries, one per line. Blank lines and lines starting with '#' are ignored.
+
+    Args:
+        path (str): The path to the popular queries file.
+
+    Returns:
+        list[str]: The popular queries, or an empty list if the file does not exist.
+    """
+    if not os.path.exists(path):
+        logger.warning(f"Popular queries file not found: {path}")
+        return []
+    with open(path, encoding="utf-8") as queries_file:
+        return [line.strip() for line in queries_file if line.strip() and not line.startswith("#")]
+
+
+def catalogue_phrases(chroma_db) -> Iterator[str]:
+    """
+    Stream the name and category of every product, one metadata page at a time.
+
+    Args:
+        chroma_db (ChromaDatabase | ShardedChromaDatabase): The database to read.
+
+    Yields:
+        str: The product names and categories.
+    """
+    for _, metadatas in chroma_db.iter_metadatas():
+        for meta in metadatas:
+            yield from (meta[field] for field in ("name", "category") if meta.get(field))
+
+
+def main():
+    # Same single/sharded database as the MCP Server, so precomputed results cover every shard
+    chroma_db = create_chroma_database()
+
+    # Catalogue-driven phrases: every product name and category
+    phrases = itertools.chain(catalogue_phrases(chroma_db), read_popular_queries(os.getenv("POPULAR_QUERIES_PATH", "popular_queries.txt")))
+
+    index = QuerySuggestionIndex.build(chroma_db, phrases, top_k=int(os.getenv("SUGGESTION_INDEX_TOP_K", "4")))
+    index.save(os.getenv("SUGGESTION_INDEX_PATH", "suggestion_index.npz"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,212 @@
 
 from fastmcp import FastMCP
-from mcp_server.utils import image_to_base64, base64_to_ndarray, ndarray_to_base64
-from mcp_server.db import ChromaDatabase
+from mcp_server.utils import image_to_base64, base64_to_ndarray, ndarray_to_base64, base64_to_image, image_to_dhash
+from mcp_server.db import create_chroma_database
+from mcp_server.suggestions import QuerySuggestionIndex, normalize_query
+from mcp_server.cache import PerceptualHashCache
+from mcp_server.lexical import BM25Index
+from mcp_server.fusion import multimodal_search, reciprocal_rank_fusion, validate_fusion_query
+from mcp_server.coalescing import SingleFlight
+from mcp_server.logging_config import setup_logging, start_request_sampling, summarize_payload
+from mcp_server.images import ImageStore, image_response
+from mcp_server.metrics import InstrumentedThreadPoolExecutor, track_request, track_stage, record_cache, record_error, register_single_flight
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.requests import Request
+from starlette.responses import Response
+from contextlib import asynccontextmanager
 from typing import List, Dict
+import asyncio
+import numpy as np
 import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO, 
-    # time in a human-readable format, the severity of the message, and the message content
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(), # display the logs in the console
-        logging.FileHandler("mcp_server.log") # saves the logs into a file
-    ]
-)
+load_dotenv()  
+
+# Setup logging: JSON lines written through a background queue, sampled per request
+setup_logging("mcp_server.log", level=os.getenv("LOG_LEVEL", "INFO"), sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "1.0")))
 
 logger = logging.getLogger(__name__)
 
+# Initialize ChromaDB connection: scatter-gather over CHROMADB_SHARDS if set, otherwise a single collection
+chroma_db = create_chroma_database()
 
-load_dotenv()  
+# Load the precomputed query suggestion index (built offline by build_suggestion_index.py)
+suggestion_index_path = os.getenv("SUGGESTION_INDEX_PATH", "suggestion_index.npz")
+suggestion_index = QuerySuggestionIndex.load(suggestion_index_path) if os.path.exists(suggestion_index_path) else None
+
+# Recent image queries keyed by perceptual hash, so near-identical uploads skip the CLIP image encoder
+image_search_cache = PerceptualHashCache(max_entries=int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "128")),
+                                         max_distance=int(os.getenv("IMAGE_CACHE_MAX_DISTANCE", "4")))
+
+# In-memory BM25 index over product metadata, kept in sync with the collection in the background
+lexical_index = BM25Index()
+try:
+    lexical_index.full_sync(chroma_db)
+except Exception as e:
+    # e.g. a shard is down: index what is reachable, the background sync completes it later
+    logger.error(f"An error occurred during the full sync of the lexical index: {e}")
+    lexical_index.sync(chroma_db)
+
+
+def refresh_lexical_index(interval: float, full_interval: float) -> None:
+    """
+    Periodically pick up items added to or deleted from the collection, and every
+    `full_interval` seconds re-read all metadata to pick up items edited in place.
+
+    Args:
+        interval (float): Seconds between two id syncs.
+        full_interval (float): Seconds between two full syncs (0 disables them).
+    """
+    last_full_sync = time.monotonic()
+    while True:
+        time.sleep(interval)
+        try:
+            if full_interval > 0 and time.monotonic() - last_full_sync >= full_interval:
+                lexical_index.full_sync(chroma_db)
+                last_full_sync = time.monotonic()
+            else:
+                lexical_index.sync(chroma_db)
+        except Exception as e:
+            logger.error(f"An error occurred while syncing the lexical index: {e}")
+
+
+lexical_refresh_seconds = float(os.getenv("LEXICAL_INDEX_REFRESH_SECONDS", "300"))
+lexical_full_refresh_seconds = float(os.getenv("LEXICAL_INDEX_FULL_REFRESH_SECONDS", "3600"))
+if lexical_refresh_seconds > 0:
+    threading.Thread(target=refresh_lexical_index, args=(lexical_refresh_seconds, lexical_full_refresh_seconds), daemon=True).start()
+
+# Identical concurrent searches share one in-flight computation
+single_flight = SingleFlight()
+register_single_flight(single_flight)
+
+# Decodes the images of a multimodal query in parallel (PIL releases the GIL while decoding)
+image_decode_executor = InstrumentedThreadPoolExecutor("image_decode", max_workers=4, thread_name_prefix="image_decode")
+
+# Replaces the default executor of the event loop, which runs asyncio.to_thread (same size as asyncio's default)
+to_thread_executor = InstrumentedThreadPoolExecutor("asyncio_to_thread", max_workers=min(32, (os.cpu_count() or 1) + 4), thread_name_prefix="asyncio")
+
+# Result images served by URL from disk instead of inline base64 (only if IMAGE_BASE_URL is set)
+image_store = ImageStore(os.getenv("IMAGE_STORE_DIR", "image_store"), os.getenv("IMAGE_BASE_URL")) if os.getenv("IMAGE_BASE_URL") else None
+
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """
+    Run the blocking parts of the tools on the instrumented executor.
+
+    Args:
+        server (FastMCP): The MCP server.
+    """
+    asyncio.get_running_loop().set_default_executor(to_thread_executor)
+    yield
 
-# Initialize ChromaDB connection
-chroma_db = ChromaDatabase(host=os.getenv("CHROMADB_HOST"), port=int(os.getenv("CHROMADB_PORT")), collection_name=os.getenv("CHROMADB_COLLECTION_NAME"))
 
 # Create mcp server instance
-mcp = FastMCP(name=os.getenv("MCP_SERVER_NAME"), port=int(os.getenv("MCP_SERVER_PORT")))
+mcp = FastMCP(name=os.getenv("MCP_SERVER_NAME"), port=int(os.getenv("MCP_SERVER_PORT")), lifespan=lifespan)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> Response:
+    """
+    Expose the server metrics in the Prometheus text format.
+
+    Args:
+        request (Request): The HTTP request.
+
+    Returns:
+        Response: The current value of every metric.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@mcp.custom_route("/images/{image_hash}", methods=["GET", "HEAD"])
+async def image_endpoint(request: Request) -> Response:
+    """
+    Serve a product image by the content hash in its URL, with ETag/Cache-Control and byte-range support.
+
+    Args:
+        request (Request): The HTTP request.
+
+    Returns:
+        Response: The image file, 304 if the client copy is current, or 404.
+    """
+    if image_store is None:
+        return Response(status_code=404)
+    return image_response(image_store, request.path_params["image_hash"], request.headers.get("if-none-match"))
+
+
+def format_results(metadatas: List[Dict]) -> List[Dict]:
+    """
+    Build the tool response items from the metadata of the retrieved images.
+
+    If an image store is configured, each item carries the 'image_url' of the image
+    (keyed by its content hash) and its metadata without the base64 payload; otherwise
+    the image is inlined.
+
+    Args:
+        metadatas (List[Dict]): The metadata of each retrieved image.
+
+    Returns:
+        List[Dict]: list: a list of items each containing 'metadata' and 'image_url' or 'base64_image'.
+    """
+    if image_store is not None:
+        items = []
+        for metadata in metadatas:
+            image_hash = image_store.ensure(metadata['base64_image'])
+            items.append({
+                "metadata": {key: value for key, value in metadata.items() if key != 'base64_image'},
+                "image_url": image_store.url(image_hash),
+            })
+        return items
+    return [
+        {
+            # Metadata associated with the image
+            "metadata": metadata,
+            # Matrix of pixel values converted to base64 string
+            "base64_image": metadata['base64_image']
+        }
+        for metadata in metadatas
+    ]
+
+
+def search_suggestion_index(tool: str, text_query: str, top_k: int) -> List[Dict] | None:
+    """
+    Answer a text query from the precomputed suggestion index, skipping the CLIP text encoder.
+
+    Args:
+        tool (str): The name of the calling tool, used to label the metrics.
+        text_query (str): The text query.
+        top_k (int): The number of top results to retrieve.
+
+    Returns:
+        List[Dict] | None: The results, or None if the query is not in the index.
+    """
+    if suggestion_index is None:
+        return None
+    hit = suggestion_index.lookup(text_query)
+    record_cache("suggestion_index", hit=hit is not None)
+    if hit is None:
+        return None
+    logger.info("Suggestion index hit", extra={"fields": {"text_query": summarize_payload(text_query)}})
+    with track_stage(tool, "vector_query"):
+        if top_k <= len(hit.ids):
+            # Exact precomputed results: only a key lookup in ChromaDB
+            result = chroma_db.get_by_ids(hit.ids[:top_k])
+            ids, metadatas = result["ids"], result["metadatas"]
+        else:
+            # More results than precomputed: reuse the stored embedding
+            result = chroma_db.search_by_embeddings([hit.embedding], n_results=top_k)
+            ids, metadatas = result["ids"][0], result["metadatas"][0]
+    with track_stage(tool, "serialize"):
+        return format_results(metadatas)
 
 
 @mcp.tool
-def image_to_image_search_tool(image_query:str,top_k: int)-> List[Dict]:
+async def image_to_image_search_tool(image_query:str,top_k: int)-> List[Dict]:
     """
     Perform an image to image search using the provided ChromaDB collection.
     Args:
@@ -42,27 +217,55 @@ def image_to_image_search_tool(image_query:str,top_k: int)-> List[Dict]:
     Returns:
         List[Dict]: list: a list of items each containing 'data' and 'metadata'.
     """
-    logger.info(f"Calling 'image_to_image_search' with top_k: {top_k}")
-    # Convert the base64-encoded image to a NumPy array
-    image_query_array = base64_to_ndarray(image_query)
+    start_request_sampling()
+    logger.info("Calling 'image_to_image_search'", extra={"fields": {"image_query_size": len(image_query), "top_k": top_k}})
+    with track_request("image_to_image_search_tool"):
+        # Decoding, hashing and CLIP encoding are blocking: keep them off the event loop
+        return await asyncio.to_thread(image_to_image_search, image_query, top_k)
+
+
+def image_to_image_search(image_query: str, top_k: int) -> List[Dict]:
+    """
+    Blocking implementation of `image_to_image_search_tool`.
+
+    Args:
+        image_query (str): base64-encoded string of the query image.
+        top_k (int): The number of top results to retrieve.
+
+    Returns:
+        List[Dict]: list: a list of items each containing 'metadata' and 'image_url' or 'base64_image'.
+    """
+    tool = "image_to_image_search_tool"
+    # Decode once: the same image feeds the perceptual hash and, on a miss, the CLIP encoder
+    with track_stage(tool, "decode"):
+        image = base64_to_image(image_query)
+    with track_stage(tool, "hash"):
+        image_hash = image_to_dhash(image)
+    cached = image_search_cache.get(image_hash)
+    record_cache("image_phash", hit=cached is not None)
+    if cached is not None and top_k <= len(cached.metadatas):
+        with track_stage(tool, "serialize"):
+            return format_results(cached.metadatas[:top_k])
+
+    if cached is not None:
+        # Near-identical image seen before: reuse its embedding
+        embedding = cached.embedding
+    else:
+        with track_stage(tool, "embed"):
+            embedding = chroma_db.embed_images([np.array(image)])[0]
     # Perform the image to image search
-    result = chroma_db.image_to_image_search( image_query_array, n_results=top_k)
-    logger.debug(f"Image to Image Search Result: {result}")
+    with track_stage(tool, "vector_query"):
+        result = chroma_db.search_by_embeddings([embedding], n_results=top_k)
+    logger.debug("Image to Image Search Result", extra={"fields": {"results": len(result["ids"][0])}})
 
-    metadatas = result["metadatas"][0]
-    return [
-        {   
-            # Metadata associated with the image
-            "metadata": metadatas[i],
-            # Matrix of pixel values converted to base64 string
-            "base64_image": metadatas[i]['base64_image']
-        }
-        for i in range(len(metadatas))
-    ]  
+    ids, metadatas = result["ids"][0], result["metadatas"][0]
+    image_search_cache.put(image_hash, embedding, ids, metadatas)
+    with track_stage(tool, "serialize"):
+        return format_results(metadatas)
     
 
 @mcp.tool
-def text_to_image_search_tool(text_query: str, top_k: int)-> List[Dict]:
+async def text_to_image_search_tool(text_query: str, top_k: int)-> List[Dict]:
 
     """
     Perform a text to image search using the provided ChromaDB collection.
@@ -75,31 +278,208 @@ def text_to_image_search_tool(text_query: str, top_k: int)-> List[Dict]:
     Returns:
         List[Dict]: list: a list of items each containing 'uri' and 'metadata'.
     """
-    logger.info(f"Calling 'text_to_image_search' with query: '{text_query}' and top_k: {top_k}")
+    start_request_sampling()
+    logger.info("Calling 'text_to_image_search'", extra={"fields": {"text_query": summarize_payload(text_query), "top_k": top_k}})
+    key = ("text_to_image_search_tool", normalize_query(text_query), top_k)
+    with track_request("text_to_image_search_tool"):
+        return await single_flight.run(key, text_to_image_search, text_query, top_k)
+
+
+def text_to_image_search(text_query: str, top_k: int) -> List[Dict]:
+    """
+    Blocking implementation of `text_to_image_search_tool`.
+
+    Args:
+        text_query (str): The text query.
+        top_k (int): The number of top results to retrieve.
 
+    Returns:
+        List[Dict]: list: a list of items each containing 'metadata' and 'image_url' or 'base64_image'.
+    """
+    tool = "text_to_image_search_tool"
     # Perform the search
     try:
-        result = chroma_db.text_to_image_search(text_query, n_results=top_k)
-        logger.info(f"Text to Image Search Result: {result}")
+        cached = search_suggestion_index(tool, text_query, top_k)
+        if cached is not None:
+            return cached
 
+        with track_stage(tool, "embed"):
+            embedding = chroma_db.embed_texts([text_query])[0]
+        with track_stage(tool, "vector_query"):
+            result = chroma_db.search_by_embeddings([embedding], n_results=top_k)
         # Check if there are URIs and metadata in the result
-        metadatas = result["metadatas"][0]
+        ids, metadatas = result["ids"][0], result["metadatas"][0]
+        logger.info("Text to Image Search Result", extra={"fields": {"results": len(metadatas)}})
     
-        return [
-            {   
-                # Metadata associated with the image
-                "metadata": metadatas[i],
-                # Matrix of pixel values converted to base64 string
-                "base64_image": metadatas[i]['base64_image']
-            }
-            for i in range(len(metadatas))
-        ]
+        with track_stage(tool, "serialize"):
+            return format_results(metadatas)
     
     except Exception as e:
+        record_error(tool)
         logger.error(f"An error occurred during the text-to-image search for query '{text_query}': {e}")
         return []  # Return empty list or handle the error as needed
             
 
+@mcp.tool
+async def hybrid_search_tool(text_query: str, top_k: int) -> List[Dict]:
+    """
+    Perform a hybrid lexical + vector search, fusing BM25 ranking over the product metadata
+    with CLIP text-image similarity using reciprocal rank fusion.
+
+    Exact product names and SKU-like terms are matched lexically; the lexical candidates
+    narrow the vector search when there are enough of them.
+
+    Args:
+        text_query (str): The text query.
+        top_k (int): The number of top results to retrieve.
+
+    Returns:
+        List[Dict]: list: a list of items each containing 'metadata' and 'image_url' or 'base64_image'.
+    """
+    start_request_sampling()
+    logger.info("Calling 'hybrid_search'", extra={"fields": {"text_query": summarize_payload(text_query), "top_k": top_k}})
+    key = ("hybrid_search_tool", normalize_query(text_query), top_k)
+    with track_request("hybrid_search_tool"):
+        return await single_flight.run(key, hybrid_search, text_query, top_k)
+
+
+def hybrid_search(text_query: str, top_k: int) -> List[Dict]:
+    """
+    Blocking implementation of `hybrid_search_tool`.
+
+    Args:
+        text_query (str): The text query.
+        top_k (int): The number of top results to retrieve.
+
+    Returns:
+        List[Dict]: list: a list of items each containing 'metadata' and 'image_url' or 'base64_image'.
+    """
+    tool = "hybrid_search_tool"
+    try:
+        with track_stage(tool, "lexical_query"):
+            lexical_ids = [doc_id for doc_id, _ in lexical_index.search(text_query, limit=int(os.getenv("HYBRID_LEXICAL_CANDIDATES", "50")))]
+
+        hit = suggestion_index.lookup(text_query) if suggestion_index is not None else None
+        if hit is not None:
+            embedding = hit.embedding
+        else:
+            with track_stage(tool, "embed"):
+                embedding = chroma_db.embed_texts([text_query])[0]
+        with track_stage(tool, "vector_query"):
+            if len(lexical_ids) >= top_k:
+                # Vector search restricted to the lexical candidates
+                vector = chroma_db.search_by_embeddings([embedding], n_results=len(lexical_ids), ids=lexical_ids)
+            else:
+                vector = chroma_db.search_by_embeddings([embedding], n_results=top_k)
+        vector_ids = vector["ids"][0]
+        metadata_by_id = dict(zip(vector_ids, vector["metadatas"][0]))
+
+        fused_ids = reciprocal_rank_fusion([lexical_ids, vector_ids])[:top_k]
+        missing_ids = [doc_id for doc_id in fused_ids if doc_id not in metadata_by_id]
+        if missing_ids:
+            fetched = chroma_db.get_by_ids(missing_ids)
+            metadata_by_id.update(zip(fetched["ids"], fetched["metadatas"]))
+        found_ids = [doc_id for doc_id in fused_ids if doc_id in metadata_by_id]
+        return format_results([metadata_by_id[doc_id] for doc_id in found_ids])
+
+    except Exception as e:
+        record_error(tool)
+        logger.error(f"An error occurred during the hybrid search for query '{text_query}': {e}")
+        return []
+
+
+@mcp.tool
+async def multimodal_fusion_search_tool(text_queries: List[str], image_queries: List[str], top_k: int,
+                                        mode: str = "embedding", weights: List[float] | None = None) -> List[Dict]:
+    """
+    Perform a search combining several queries of different modalities (e.g. typed text,
+    transcribed audio and an image).
+
+    Images are decoded in parallel, then all texts are encoded in one CLIP batch and all
+    images in another. In 'embedding' mode the embeddings are combined by weighted
+    averaging and searched once; in 'rrf' mode each embedding is searched and the
+    rankings are merged with weighted reciprocal rank fusion.
+
+    Args:
+        text_queries (List[str]): The text queries.
+        image_queries (List[str]): base64-encoded strings of the query images.
+        top_k (int): The number of top results to retrieve.
+        mode (str): 'embedding' (weighted embedding average) or 'rrf' (rank fusion).
+        weights (List[float] | None): The weight of each query, texts first then images. Equal weights if None.
+
+    Returns:
+        List[Dict]: list: a list of items each containing 'metadata' and 'image_url' or 'base64_image'.
+    """
+    start_request_sampling()
+    logger.info("Calling 'multimodal_fusion_search'", extra={"fields": {"text_queries": len(text_queries), "image_queries": len(image_queries), "top_k": top_k, "mode": mode}})
+    with track_request("multimodal_fusion_search_tool"):
+        return await asyncio.to_thread(multimodal_fusion_search, text_queries, image_queries, top_k, mode, weights)
+
+
+def multimodal_fusion_search(text_queries: List[str], image_queries: List[str], top_k: int, mode: str, weights: List[float] | None) -> List[Dict]:
+    """
+    Blocking implementation of `multimodal_fusion_search_tool`.
+
+    Args:
+        text_queries (List[str]): The text queries.
+        image_queries (List[str]): base64-encoded strings of the query images.
+        top_k (int): The number of top results to retrieve.
+        mode (str): 'embedding' (weighted embedding average) or 'rrf' (rank fusion).
+        weights (List[float] | None): The weight of each query, texts first then images. Equal weights if None.
+
+    Returns:
+        List[Dict]: list: a list of items each containing 'metadata' and 'image_url' or 'base64_image'.
+    """
+    tool = "multimodal_fusion_search_tool"
+    try:
+        validate_fusion_query(len(text_queries), len(image_queries), mode, weights)
+        with track_stage(tool, "decode"):
+            images = list(image_decode_executor.map(base64_to_ndarray, image_queries))
+        _, metadatas = multimodal_search(chroma_db, text_queries, images, top_k, mode, weights,
+                                         stage=lambda name: track_stage(tool, name))
+
+        with track_stage(tool, "serialize"):
+            return format_results(metadatas)
+
+    except Exception as e:
+        record_error(tool)
+        logger.error(f"An error occurred during the multimodal fusion search: {e}")
+        return []
+
+
+@mcp.tool
+def autocomplete_query_tool(prefix: str, limit: int = 5) -> List[str]:
+    """
+    Suggest product names, categories and popular queries that start with the given prefix.
+
+    Args:
+        prefix (str): The text typed so far.
+        limit (int): The maximum number of suggestions.
+
+    Returns:
+        List[str]: The suggested queries.
+    """
+    start_request_sampling()
+    logger.info("Calling 'autocomplete_query'", extra={"fields": {"prefix": prefix, "limit": limit}})
+    if suggestion_index is None:
+        return []
+    return suggestion_index.autocomplete(prefix, limit)
+
+
+@mcp.tool
+def search_stats_tool() -> Dict:
+    """
+    Report the request coalescing and cache counters of the server.
+
+    Returns:
+        Dict: The counters of each component.
+    """
+    return {
+        "coalescing": single_flight.stats(),
+        "image_search_cache": {"hits": image_search_cache.hits, "misses": image_search_cache.misses},
+    }
+
+
 if __name__ == "__main__":
     print("🚀 Launching MCP Server...")
     mcp.run(transport="streamable-http",   port=int(os.getenv("MCP_SERVER_PORT")), host=os.getenv("MCP_SERVER_HOST"))
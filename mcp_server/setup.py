@@ -14,5 +14,6 @@ setup(
         'pillow==12.0.0',
         'open_clip_torch==3.2.0',
         'python-dotenv==1.2.1',
+        'prometheus-client==0.23.1',
     ],
 )
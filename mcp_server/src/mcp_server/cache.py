@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+import threading
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedImageSearch:
+    """Query embedding and results of a previous image search."""
+    embedding: np.ndarray
+    ids: list[str]
+    metadatas: list[dict]
+
+
+class PerceptualHashCache:
+    """
+    Bounded LRU cache of image searches keyed by the perceptual hash of the query image.
+
+    A lookup matches any cached hash within `max_distance` bits (Hamming distance),
+    so re-uploaded or slightly re-compressed images reuse the previous search.
+    """
+
+    def __init__(self, max_entries: int, max_distance: int):
+        """
+        Initialize the PerceptualHashCache object.
+
+        Args:
+            max_entries (int): The maximum number of cached searches.
+            max_distance (int): The maximum Hamming distance between two hashes considered the same image.
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._entries: OrderedDict[int, CachedImageSearch] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, image_hash: int) -> Optional[CachedImageSearch]:
+        """
+        Find the cached search whose hash is closest to the given one.
+
+        Args:
+            image_hash (int): The perceptual hash of the query image.
+
+        Returns:
+            Optional[CachedImageSearch]: The cached search, or None if no hash is close enough.
+        """
+        with self._lock:
+            best_hash, best_distance = None, self.max_distance + 1
+            for cached_hash in self._entries:
+                distance = (cached_hash ^ image_hash).bit_count()
+                if distance < best_distance:
+                    best_hash, best_distance = cached_hash, distance
+                    if distance == 0:
+                        break
+            if best_hash is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_hash)
+            logger.info("Perceptual hash cache hit (distance: %d)", best_distance)
+            return self._entries[best_hash]
+
+    def put(self, image_hash: int, embedding: np.ndarray, ids: list[str], metadatas: list[dict]) -> None:
+        """
+        Cache the embedding and results of an image search, evicting the least recently used entry if full.
+
+        Args:
+            image_hash (int): The perceptual hash of the query image.
+            embedding (np.ndarray): The CLIP embedding of the query image.
+            ids (list[str]): The ids of the retrieved images, best match first.
+            metadatas (list[dict]): The metadata of the retrieved images, best match first.
+        """
+        with self._lock:
+            self._entries[image_hash] = CachedImageSearch(embedding=embedding, ids=ids, metadatas=metadatas)
+            self._entries.move_to_end(image_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
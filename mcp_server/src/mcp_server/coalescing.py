@@ -0,0 +1,55 @@
+from typing import Any, Callable, Hashable
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls into a single computation.
+
+    The first call for a key runs the function in a worker thread; calls with the
+    same key arriving while it is in flight wait for it and share its result.
+    """
+
+    def __init__(self):
+        """
+        Initialize the SingleFlight object.
+        """
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args) in a worker thread, unless a call with the same key is already in flight.
+
+        Args:
+            key (Hashable): Identifies identical calls, e.g. the tool name and its normalised arguments.
+            fn (Callable[..., Any]): The blocking function to run.
+            *args (Any): The arguments to pass to the function.
+
+        Returns:
+            Any: The result of the (possibly shared) computation.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+            logger.info("Coalesced call with an in-flight computation: %s", key)
+        # Shield the shared computation so that a cancelled caller does not cancel it for the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """
+        Return the coalescing counters.
+
+        Returns:
+            dict: The number of executed computations, coalesced calls and computations in flight.
+        """
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
@@ -1,12 +1,72 @@
 import chromadb
 from chromadb.utils.embedding_functions import OpenCLIPEmbeddingFunction
 from chromadb.utils.data_loaders import ImageLoader
+from mcp_server.sharding import ShardedChromaDatabase
+from mcp_server.utils import parse_shards
+from PIL import Image
+from typing import Iterator
+import numpy as np
+import torch
+import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Private attributes of OpenCLIPEmbeddingFunction (chromadb==1.3.5) that clip_embed relies on
+CLIP_INTERNALS = ("_model", "_tokenizer", "_preprocess")
+
+
+def check_clip_internals(embedding_function: OpenCLIPEmbeddingFunction) -> None:
+    """
+    Fail at startup, rather than inside every search, if the installed chromadb no longer
+    exposes the CLIP internals used by `clip_embed`.
+
+    Args:
+        embedding_function (OpenCLIPEmbeddingFunction): The embedding function holding the CLIP model.
+
+    Raises:
+        RuntimeError: If an attribute is missing.
+    """
+    missing = [attribute for attribute in CLIP_INTERNALS if not hasattr(embedding_function, attribute)]
+    if missing:
+        raise RuntimeError(f"OpenCLIPEmbeddingFunction of chromadb {chromadb.__version__} has no {', '.join(missing)}: "
+                           "clip_embed must be updated for this version")
+
+
+def clip_embed(embedding_function: OpenCLIPEmbeddingFunction, texts: list[str], images: list[np.ndarray]) -> list[np.ndarray]:
+    """
+    Compute CLIP embeddings with one forward pass per modality.
+
+    OpenCLIPEmbeddingFunction encodes its inputs one at a time. Here all texts are tokenized
+    into a single batch for `encode_text`, and all images preprocessed and stacked into a
+    single batch for `encode_image`.
+
+    Args:
+        embedding_function (OpenCLIPEmbeddingFunction): The embedding function holding the CLIP model.
+        texts (list[str]): The texts to embed.
+        images (list[np.ndarray]): The images as RGB pixel arrays.
+
+    Returns:
+        list[np.ndarray]: One L2-normalised embedding per input, texts first then images.
+    """
+    model = embedding_function._model
+    device = next(model.parameters()).device
+    batches = []
+    with torch.no_grad():
+        if texts:
+            batches.append(model.encode_text(embedding_function._tokenizer(texts).to(device)))
+        if images:
+            pixels = torch.stack([embedding_function._preprocess(Image.fromarray(image)) for image in images])
+            batches.append(model.encode_image(pixels.to(device)))
+    embeddings = []
+    for features in batches:
+        features = features / features.norm(dim=-1, keepdim=True)
+        embeddings.extend(features.cpu().numpy())
+    return embeddings
+
+
 class ChromaDatabase:
-    def __init__(self, host: str, port: int, collection_name: str):
+    def __init__(self, host: str, port: int, collection_name: str, embedding_function: OpenCLIPEmbeddingFunction | None = None):
         """
         Initialize the ChromaDatabase object.
 
@@ -14,6 +74,8 @@ class ChromaDatabase:
             host (str): The host name of the ChromaDB server.
             port (int): The port number of the ChromaDB server.
             collection_name (str): The name of the ChromaDB collection.
+            embedding_function (OpenCLIPEmbeddingFunction | None): Embedding function shared with other
+                collections, so the CLIP model is loaded once. A new one is created if None.
 
         Returns:
             None
@@ -21,8 +83,10 @@ class ChromaDatabase:
         logger.info(f"Initializing ChromaDatabase with host: {host}, port: {port}, collection_name: {collection_name}")
         self.client = chromadb.HttpClient(host=host, port=port)
 
-        self.collection = self.client.get_collection(collection_name, 
-                                                     embedding_function=OpenCLIPEmbeddingFunction(),
+        self.embedding_function = embedding_function or OpenCLIPEmbeddingFunction()
+        check_clip_internals(self.embedding_function)
+        self.collection = self.client.get_collection(collection_name,
+                                                     embedding_function=self.embedding_function,
                                                      data_loader=ImageLoader())
 
 
@@ -36,7 +100,7 @@ class ChromaDatabase:
         Returns:
             str: response with retrieved images and their metadata.
         """
-        logger.info(f"Text to Image Search: {text_query}")
+        logger.info("Text to Image Search: %s", text_query)
         return self.collection.query(query_texts=[text_query], include=['data', 'metadatas','uris','distances'], n_results=n_results)
 
     def image_to_image_search(self, image_query: str, n_results: int) -> str:
@@ -49,5 +113,115 @@ class ChromaDatabase:
         Returns:
             str: response with retrieved images and their metadata.
         """
-        logger.info(f"Image to Image Search")
+        logger.info("Image to Image Search")
         return self.collection.query(query_images=[image_query], include=['data','metadatas','uris','distances'], n_results=n_results)
+
+    def embed_texts(self, texts: list[str]) -> list[np.ndarray]:
+        """Compute the CLIP embeddings of the given texts.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            list[np.ndarray]: One embedding per text, in the same order.
+        """
+        logger.info("Embedding %d texts", len(texts))
+        return clip_embed(self.embedding_function, texts, [])
+
+    def embed_images(self, images: list[np.ndarray]) -> list[np.ndarray]:
+        """Compute the CLIP embeddings of the given images.
+
+        Args:
+            images (list[np.ndarray]): The images as RGB pixel arrays.
+
+        Returns:
+            list[np.ndarray]: One embedding per image, in the same order.
+        """
+        logger.info("Embedding %d images", len(images))
+        return clip_embed(self.embedding_function, [], images)
+
+    def embed(self, texts: list[str], images: list[np.ndarray]) -> list[np.ndarray]:
+        """Compute the CLIP embeddings of texts and images, one batch per modality.
+
+        Args:
+            texts (list[str]): The texts to embed.
+            images (list[np.ndarray]): The images as RGB pixel arrays.
+
+        Returns:
+            list[np.ndarray]: One embedding per input, texts first then images.
+        """
+        logger.info("Embedding %d texts and %d images", len(texts), len(images))
+        return clip_embed(self.embedding_function, texts, images)
+
+    def search_by_embeddings(self, embeddings: list[np.ndarray], n_results: int, ids: list[str] | None = None, bulk: bool = False) -> dict:
+        """Search for images using precomputed query embeddings, skipping the CLIP encoder.
+
+        Args:
+            embeddings (list[np.ndarray]): The query embeddings.
+            n_results (int): The number of results to retrieve per embedding.
+            ids (list[str] | None): Restrict the search to these candidate ids. Searches the whole collection if None.
+            bulk (bool): Offline search. Only meaningful for sharded databases, which then skip their per-query timeout.
+
+        Returns:
+            dict: response with one list of ids, metadatas and distances per embedding.
+        """
+        logger.info("Embedding Search: %d queries", len(embeddings))
+        return self.collection.query(query_embeddings=embeddings, ids=ids, include=['metadatas', 'distances'], n_results=n_results)
+
+    def get_by_ids(self, ids: list[str], bulk: bool = False) -> dict:
+        """Fetch items by id, preserving the order of the given ids.
+
+        Args:
+            ids (list[str]): The ids of the items to fetch.
+            bulk (bool): Background fetch. Only meaningful for sharded databases, which then skip their per-query timeout.
+
+        Returns:
+            dict: response with the 'ids' and 'metadatas' of the items found.
+        """
+        result = self.collection.get(ids=ids, include=['metadatas'])
+        by_id = dict(zip(result["ids"], result["metadatas"]))
+        found = [item_id for item_id in ids if item_id in by_id]
+        return {"ids": found, "metadatas": [by_id[item_id] for item_id in found]}
+
+    def get_all_ids(self) -> tuple[list[str], bool]:
+        """Fetch the ids of every item in the collection, without their metadata.
+
+        Returns:
+            tuple[list[str], bool]: The ids of the items, and whether the listing is complete (always True for a single collection).
+        """
+        return self.collection.get(include=[])["ids"], True
+
+    def iter_metadatas(self, batch_size: int = 500) -> Iterator[tuple[list[str], list[dict]]]:
+        """Stream the ids and metadata of every item in the collection, one page at a time.
+
+        Args:
+            batch_size (int): The number of items to fetch per request.
+
+        Yields:
+            tuple[list[str], list[dict]]: The ids and metadata of the next page of items.
+        """
+        offset = 0
+        while True:
+            batch = self.collection.get(include=['metadatas'], limit=batch_size, offset=offset)
+            if not batch["ids"]:
+                break
+            yield batch["ids"], batch["metadatas"]
+            offset += len(batch["ids"])
+        logger.info(f"Fetched metadata for {offset} items")
+
+
+def create_chroma_database() -> ChromaDatabase | ShardedChromaDatabase:
+    """
+    Create the database configured by the environment: scatter-gather over CHROMADB_SHARDS
+    if set, otherwise the single CHROMADB_HOST/CHROMADB_PORT/CHROMADB_COLLECTION_NAME collection.
+
+    Returns:
+        ChromaDatabase | ShardedChromaDatabase: The database.
+    """
+    if os.getenv("CHROMADB_SHARDS"):
+        # One CLIP model shared by every shard
+        embedding_function = OpenCLIPEmbeddingFunction()
+        shards = [ChromaDatabase(host, port, collection_name, embedding_function=embedding_function)
+                  for host, port, collection_name in parse_shards(os.getenv("CHROMADB_SHARDS"))]
+        return ShardedChromaDatabase(shards, timeout=float(os.getenv("CHROMADB_SHARD_TIMEOUT_SECONDS", "2.0")))
+    return ChromaDatabase(host=os.getenv("CHROMADB_HOST"), port=int(os.getenv("CHROMADB_PORT")), collection_name=os.getenv("CHROMADB_COLLECTION_NAME"))
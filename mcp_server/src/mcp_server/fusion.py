@@ -0,0 +1,108 @@
+from contextlib import AbstractContextManager, nullcontext
+from typing import Callable
+import numpy as np
+
+# 'embedding': weighted embedding average searched once; 'rrf': each query searched, rankings fused
+FUSION_MODES = ("embedding", "rrf")
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60, weights: list[float] | None = None) -> list[str]:
+    """
+    Merge several rankings of ids with reciprocal rank fusion (RRF).
+
+    Each id scores sum(weight / (k + rank)) over the rankings it appears in, so ids
+    ranked well by several retrievers rise to the top without comparing their raw scores.
+
+    Args:
+        rankings (list[list[str]]): The rankings to merge, best match first.
+        k (int): The RRF smoothing constant.
+        weights (list[float] | None): The weight of each ranking. All rankings weigh 1.0 if None.
+
+    Returns:
+        list[str]: The fused ranking, best match first.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + weight / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def weighted_average_embedding(embeddings: list[np.ndarray], weights: list[float] | None = None) -> np.ndarray:
+    """
+    Combine several query embeddings (e.g. text and image) into a single one.
+
+    Embeddings are L2-normalised before averaging so that no modality dominates
+    because of its norm, and the average is normalised again.
+
+    Args:
+        embeddings (list[np.ndarray]): The query embeddings.
+        weights (list[float] | None): The weight of each embedding. Equal weights if None.
+
+    Returns:
+        np.ndarray: The fused, L2-normalised embedding.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    fused = np.average(matrix, axis=0, weights=weights)
+    return fused / np.linalg.norm(fused)
+
+
+def validate_fusion_query(text_count: int, image_count: int, mode: str, weights: list[float] | None) -> None:
+    """
+    Check a multimodal fusion query before any work is done on it.
+
+    Args:
+        text_count (int): The number of text queries.
+        image_count (int): The number of image queries.
+        mode (str): The fusion mode, one of FUSION_MODES.
+        weights (list[float] | None): The weight of each query, texts first then images.
+
+    Raises:
+        ValueError: If there is no query, the number of weights does not match, or the mode is unknown.
+    """
+    if not text_count and not image_count:
+        raise ValueError("At least one text or image query is required")
+    if weights is not None and len(weights) != text_count + image_count:
+        raise ValueError("One weight per query is required")
+    if mode not in FUSION_MODES:
+        raise ValueError(f"Unknown fusion mode: {mode!r}")
+
+
+def multimodal_search(chroma_db, text_queries: list[str], images: list[np.ndarray], top_k: int, mode: str,
+                      weights: list[float] | None = None,
+                      stage: Callable[[str], AbstractContextManager] = lambda name: nullcontext()) -> tuple[list[str], list[dict]]:
+    """
+    Search with several text and image queries at once (validated by `validate_fusion_query`).
+
+    Texts and images are embedded in one call, texts first, so `weights` lists the text
+    weights then the image weights. In 'embedding' mode the embeddings are combined by
+    weighted averaging and searched once; in 'rrf' mode each embedding is searched and
+    the rankings are merged with weighted reciprocal rank fusion.
+
+    Args:
+        chroma_db (ChromaDatabase | ShardedChromaDatabase): The database to search.
+        text_queries (list[str]): The text queries.
+        images (list[np.ndarray]): The query images as RGB pixel arrays.
+        top_k (int): The number of results.
+        mode (str): The fusion mode, one of FUSION_MODES.
+        weights (list[float] | None): The weight of each query, texts first then images. Equal weights if None.
+        stage (Callable[[str], AbstractContextManager]): Times each stage ('embed', 'vector_query').
+
+    Returns:
+        tuple[list[str], list[dict]]: The ids and metadata of the results, best match first.
+    """
+    with stage("embed"):
+        embeddings = chroma_db.embed(list(text_queries), images)
+
+    with stage("vector_query"):
+        if mode == "rrf":
+            result = chroma_db.search_by_embeddings(embeddings, n_results=top_k)
+            metadata_by_id = {}
+            for query_ids, query_metadatas in zip(result["ids"], result["metadatas"]):
+                metadata_by_id.update(zip(query_ids, query_metadatas))
+            ids = reciprocal_rank_fusion(result["ids"], weights=weights)[:top_k]
+            return ids, [metadata_by_id[item_id] for item_id in ids]
+        result = chroma_db.search_by_embeddings([weighted_average_embedding(embeddings, weights)], n_results=top_k)
+        return result["ids"][0], result["metadatas"][0]
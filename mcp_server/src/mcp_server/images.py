@@ -0,0 +1,149 @@
+from starlette.responses import FileResponse, Response
+import base64
+import hashlib
+import os
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_IMAGE_HASH = re.compile(r"[0-9a-f]{64}")
+
+# Image URLs are content hashes, so their content never changes
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def detect_media_type(data: bytes) -> str:
+    """
+    Detect the media type of an encoded image from its magic bytes.
+
+    Args:
+        data (bytes): The first bytes of the encoded image.
+
+    Returns:
+        str: The media type, 'application/octet-stream' if unknown.
+    """
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    return "application/octet-stream"
+
+
+class ImageStore:
+    """
+    Content-addressed on-disk store of product images, served over HTTP by URL.
+
+    Images are decoded once from the base64 metadata and written to disk under the
+    SHA-256 of their bytes, so they can be sent as files with HTTP caching instead of
+    being inlined in every response. The hash is the URL and the ETag: an image that
+    changes in the collection gets a new URL, so cached copies never go stale.
+    """
+
+    def __init__(self, directory: str, base_url: str):
+        """
+        Initialize the ImageStore object.
+
+        Args:
+            directory (str): The directory where images are written.
+            base_url (str): The public base URL of the server (e.g. http://localhost:9000).
+        """
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, image_hash: str) -> str:
+        """
+        Returns the file path of an image. Only hex digests are accepted, so paths never escape the directory.
+
+        Args:
+            image_hash (str): The SHA-256 hex digest of the image.
+
+        Returns:
+            str: The file path.
+
+        Raises:
+            ValueError: If image_hash is not a SHA-256 hex digest.
+        """
+        if not _IMAGE_HASH.fullmatch(image_hash):
+            raise ValueError(f"Invalid image hash: {image_hash!r}")
+        return os.path.join(self.directory, image_hash)
+
+    def url(self, image_hash: str) -> str:
+        """
+        Returns the public URL of an image.
+
+        Args:
+            image_hash (str): The SHA-256 hex digest of the image.
+
+        Returns:
+            str: The image URL.
+        """
+        return f"{self.base_url}/images/{image_hash}"
+
+    def ensure(self, base64_image: str) -> str:
+        """
+        Write an image to disk unless it is already there.
+
+        Args:
+            base64_image (str): The base64-encoded image.
+
+        Returns:
+            str: The SHA-256 hex digest of the image, its key in the store.
+        """
+        data = base64.b64decode(base64_image)
+        image_hash = hashlib.sha256(data).hexdigest()
+        path = self.path(image_hash)
+        if not os.path.exists(path):
+            # Write then rename, so concurrent readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as image_file:
+                image_file.write(data)
+            os.replace(tmp_path, path)
+            logger.info("Stored image %s", image_hash)
+        return image_hash
+
+    def media_type(self, path: str) -> str:
+        """
+        Returns the media type of a stored image.
+
+        Args:
+            path (str): The file path.
+
+        Returns:
+            str: The media type.
+        """
+        with open(path, "rb") as image_file:
+            return detect_media_type(image_file.read(12))
+
+
+def image_response(image_store: ImageStore, image_hash: str, if_none_match: str | None) -> Response:
+    """
+    Build the HTTP response serving a stored image, with ETag/Cache-Control and byte-range support.
+
+    Args:
+        image_store (ImageStore): The image store.
+        image_hash (str): The SHA-256 hex digest of the image, from the URL.
+        if_none_match (str | None): The If-None-Match header of the request.
+
+    Returns:
+        Response: The image file, 304 if the client copy is current, or 404.
+    """
+    try:
+        path = image_store.path(image_hash)
+    except ValueError:
+        return Response(status_code=404)
+    if not os.path.exists(path):
+        return Response(status_code=404)
+
+    etag = f'"{image_hash}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+    if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    # FileResponse handles Range requests and uses zero-copy sending when the ASGI server supports it
+    return FileResponse(path, media_type=image_store.media_type(path), headers=headers)
@@ -0,0 +1,185 @@
+from collections import Counter
+import hashlib
+import heapq
+import math
+import re
+import threading
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split a text into case-folded word tokens.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list[str]: The tokens, in order of appearance.
+    """
+    return _TOKEN.findall(unicodedata.normalize("NFKC", text).casefold())
+
+
+class BM25Index:
+    """
+    In-memory inverted index over product metadata, ranked with Okapi BM25.
+
+    Documents can be added and removed at any time, so the index is kept in sync
+    with the collection incrementally instead of being rebuilt. A content hash of the
+    indexed fields is kept per document, so re-adding an unchanged document is a no-op
+    and edited documents are detected by a full sync.
+    """
+
+    def __init__(self, fields: tuple[str, ...] = ("name", "description", "category"), k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the BM25Index object.
+
+        Args:
+            fields (tuple[str, ...]): The metadata fields to index.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalisation.
+        """
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[str, int]] = {}
+        self._doc_terms: dict[str, Counter] = {}
+        self._doc_lengths: dict[str, int] = {}
+        self._doc_hashes: dict[str, str] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+    def add(self, doc_id: str, metadata: dict) -> bool:
+        """
+        Index (or re-index) a document from its metadata.
+
+        Args:
+            doc_id (str): The id of the item in the collection.
+            metadata (dict): The metadata of the item.
+
+        Returns:
+            bool: False if the document was already indexed with the same content.
+        """
+        text = " ".join(str(metadata[field]) for field in self.fields if metadata.get(field))
+        content_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        terms = Counter(tokenize(text))
+        with self._lock:
+            if self._doc_hashes.get(doc_id) == content_hash:
+                return False
+            self.remove(doc_id)
+            self._doc_terms[doc_id] = terms
+            self._doc_hashes[doc_id] = content_hash
+            self._doc_lengths[doc_id] = sum(terms.values())
+            self._total_length += self._doc_lengths[doc_id]
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = frequency
+        return True
+
+    def remove(self, doc_id: str) -> None:
+        """
+        Remove a document from the index. Unknown ids are ignored.
+
+        Args:
+            doc_id (str): The id of the item in the collection.
+        """
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            self._total_length -= self._doc_lengths.pop(doc_id)
+            del self._doc_hashes[doc_id]
+            for term in terms:
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, limit: int) -> list[tuple[str, float]]:
+        """
+        Rank the indexed documents against a query.
+
+        Args:
+            query (str): The text query.
+            limit (int): The maximum number of results.
+
+        Returns:
+            list[tuple[str, float]]: (doc_id, score) pairs, best match first. Documents sharing no term with the query are not returned.
+        """
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if n_docs == 0:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def sync(self, chroma_db, batch_size: int = 500) -> None:
+        """
+        Bring the index up to date with the collection, indexing new items and dropping deleted ones.
+
+        Only ids are compared, so this is cheap but does not see items edited in place;
+        use `full_sync` for that. If the id listing is partial (e.g. a shard is down),
+        deletions are skipped so that the documents of the missing shard are kept.
+
+        Args:
+            chroma_db (ChromaDatabase): The database to index.
+            batch_size (int): The number of items fetched per request.
+        """
+        ids, complete = chroma_db.get_all_ids()
+        collection_ids = set(ids)
+        with self._lock:
+            deleted = [doc_id for doc_id in self._doc_terms if doc_id not in collection_ids] if complete else []
+            added = [doc_id for doc_id in collection_ids if doc_id not in self._doc_terms]
+        if not complete:
+            logger.warning("Partial id listing, skipping deletions from the lexical index")
+        for doc_id in deleted:
+            self.remove(doc_id)
+        for start in range(0, len(added), batch_size):
+            batch = chroma_db.get_by_ids(added[start:start + batch_size], bulk=True)
+            for doc_id, metadata in zip(batch["ids"], batch["metadatas"]):
+                self.add(doc_id, metadata)
+        if added or deleted:
+            logger.info(f"Lexical index synced: {len(added)} added, {len(deleted)} removed, {len(self)} documents")
+
+    def full_sync(self, chroma_db, batch_size: int = 500) -> None:
+        """
+        Re-read the metadata of every item, re-indexing the ones whose indexed fields changed.
+
+        Metadata is streamed page by page, so only one page is held in memory besides the index.
+        Deletions are applied once the whole collection has been read; a failure midway raises
+        without removing anything.
+
+        Args:
+            chroma_db (ChromaDatabase): The database to index.
+            batch_size (int): The number of items fetched per request.
+        """
+        updated = 0
+        collection_ids = set()
+        for ids, metadatas in chroma_db.iter_metadatas(batch_size=batch_size):
+            updated += sum(self.add(doc_id, metadata) for doc_id, metadata in zip(ids, metadatas))
+            collection_ids.update(ids)
+        with self._lock:
+            deleted = [doc_id for doc_id in self._doc_terms if doc_id not in collection_ids]
+        for doc_id in deleted:
+            self.remove(doc_id)
+        if updated or deleted:
+            logger.info(f"Lexical index fully synced: {updated} added or updated, {len(deleted)} removed, {len(self)} documents")
@@ -0,0 +1,142 @@
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+import time
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# The frontend exposes the same metric names with service="frontend"
+SERVICE = "mcp_server"
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_LATENCY = Histogram("search_request_latency_seconds", "End-to-end latency of a search request.",
+                            ["service", "tool"], buckets=LATENCY_BUCKETS)
+STAGE_LATENCY = Histogram("search_stage_latency_seconds", "Latency of each stage of a search request.",
+                          ["service", "tool", "stage"], buckets=LATENCY_BUCKETS)
+ERRORS = Counter("search_errors", "Search requests that failed.", ["service", "tool"])
+CACHE_REQUESTS = Counter("cache_requests", "Cache lookups by result (hit or miss).", ["service", "cache", "result"])
+IN_FLIGHT = Gauge("search_in_flight_requests", "Search requests currently being processed.", ["service", "tool"])
+POOL_SIZE = Gauge("worker_pool_size", "Maximum number of worker threads of a pool.", ["service", "pool"])
+POOL_BUSY = Gauge("worker_pool_busy", "Tasks currently running in a worker pool.", ["service", "pool"])
+POOL_QUEUED = Gauge("worker_pool_queued", "Tasks waiting for a free worker of a pool.", ["service", "pool"])
+
+
+@contextmanager
+def track_request(tool: str) -> Iterator[None]:
+    """
+    Measure the latency of a whole tool call and count it as in flight while it runs.
+
+    Args:
+        tool (str): The name of the tool.
+    """
+    in_flight = IN_FLIGHT.labels(SERVICE, tool)
+    in_flight.inc()
+    start_time = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.labels(SERVICE, tool).inc()
+        raise
+    finally:
+        REQUEST_LATENCY.labels(SERVICE, tool).observe(time.perf_counter() - start_time)
+        in_flight.dec()
+
+
+@contextmanager
+def track_stage(tool: str, stage: str) -> Iterator[None]:
+    """
+    Measure the latency of one stage of a tool call (decode, embed, vector_query, serialize, ...).
+
+    Args:
+        tool (str): The name of the tool.
+        stage (str): The name of the stage.
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(SERVICE, tool, stage).observe(time.perf_counter() - start_time)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Count a cache lookup.
+
+    Args:
+        cache (str): The name of the cache.
+        hit (bool): Whether the lookup was a hit.
+    """
+    CACHE_REQUESTS.labels(SERVICE, cache, "hit" if hit else "miss").inc()
+
+
+def record_error(tool: str) -> None:
+    """
+    Count a failed tool call that was handled without raising.
+
+    Args:
+        tool (str): The name of the tool.
+    """
+    ERRORS.labels(SERVICE, tool).inc()
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor exposing its size, busy and queued tasks as worker_pool_* gauges."""
+
+    def __init__(self, pool: str, max_workers: int, thread_name_prefix: str = ""):
+        """
+        Initialize the InstrumentedThreadPoolExecutor object.
+
+        Args:
+            pool (str): The name of the pool, used to label the metrics.
+            max_workers (int): The maximum number of worker threads.
+            thread_name_prefix (str): The name prefix of the worker threads.
+        """
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        POOL_SIZE.labels(SERVICE, pool).set(max_workers)
+        self._busy = POOL_BUSY.labels(SERVICE, pool)
+        self._queued = POOL_QUEUED.labels(SERVICE, pool)
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        self._queued.inc()
+
+        def run() -> Any:
+            self._queued.dec()
+            self._busy.inc()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._busy.dec()
+
+        future = super().submit(run)
+        # A task cancelled while queued never runs
+        future.add_done_callback(lambda done: self._queued.dec() if done.cancelled() else None)
+        return future
+
+
+class SingleFlightCollector(Collector):
+    """Expose the counters kept by a SingleFlight at scrape time, adding no work to the request path."""
+
+    def __init__(self, single_flight):
+        self.single_flight = single_flight
+
+    def collect(self):
+        stats = self.single_flight.stats()
+        executed = CounterMetricFamily("single_flight_executed", "Computations started by request coalescing.", labels=["service"])
+        executed.add_metric([SERVICE], stats["executed"])
+        coalesced = CounterMetricFamily("single_flight_coalesced", "Calls that shared an in-flight computation.", labels=["service"])
+        coalesced.add_metric([SERVICE], stats["coalesced"])
+        in_flight = GaugeMetricFamily("single_flight_in_flight", "Distinct coalesced searches currently being computed.", labels=["service"])
+        in_flight.add_metric([SERVICE], stats["in_flight"])
+        return [executed, coalesced, in_flight]
+
+
+def register_single_flight(single_flight) -> None:
+    """
+    Expose the counters of a SingleFlight in the metrics registry.
+
+    Args:
+        single_flight (SingleFlight): The request coalescer.
+    """
+    REGISTRY.register(SingleFlightCollector(single_flight))
@@ -0,0 +1,229 @@
+from concurrent.futures import wait
+from mcp_server.metrics import InstrumentedThreadPoolExecutor
+from typing import Any, Iterator
+import heapq
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Separates the collection name from the item id in the ids returned by ShardedChromaDatabase
+SHARD_SEPARATOR = "/"
+
+
+def shard_item_id(collection_name: str, item_id: str) -> str:
+    """
+    Namespace an item id with the collection it belongs to.
+
+    Collections are numbered independently (every one starts at '0'), so bare ids collide across shards.
+
+    Args:
+        collection_name (str): The name of the shard collection.
+        item_id (str): The id of the item in that collection.
+
+    Returns:
+        str: The id, unique across shards.
+    """
+    return f"{collection_name}{SHARD_SEPARATOR}{item_id}"
+
+
+class ShardedChromaDatabase:
+    """
+    Scatter-gather search over several ChromaDB collections, possibly on different hosts.
+
+    Exposes the same embedding and search methods as ChromaDatabase. Queries are embedded
+    once with a shared CLIP model, sent to every shard in parallel, and the per-shard top-k
+    are merged by distance. Shards that fail or miss the timeout are skipped, returning
+    partial results. Bulk scans (id listings, metadata dumps) are not bound by the
+    per-query timeout.
+
+    Every id returned is namespaced as 'collection/id' (see `shard_item_id`), and ids passed
+    back in are routed to the shard named by their prefix.
+    """
+
+    def __init__(self, shards: list, timeout: float):
+        """
+        Initialize the ShardedChromaDatabase object.
+
+        Args:
+            shards (list[ChromaDatabase]): One database per collection, sharing the same embedding function.
+            timeout (float): Seconds to wait for the shards before returning partial results.
+
+        Raises:
+            ValueError: If two shards have the same collection name.
+        """
+        names = [shard.collection.name for shard in shards]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Shard collection names must be unique, they namespace the item ids: {names}")
+        logger.info(f"Initializing ShardedChromaDatabase with {len(shards)} shards and timeout: {timeout}s")
+        self.shards = dict(zip(names, shards))
+        self.timeout = timeout
+        # Extra workers so that shards stuck past the timeout do not starve the next queries
+        self.executor = InstrumentedThreadPoolExecutor("chroma_shard", max_workers=4 * len(self.shards), thread_name_prefix="chroma_shard")
+
+    def _scatter(self, method: str, args: tuple = (), kwargs: dict | None = None, bulk: bool = False,
+                 require_all: bool = False, shard_args: dict[str, tuple] | None = None) -> tuple[dict[str, Any], bool]:
+        """
+        Call a ChromaDatabase method on every shard in parallel.
+
+        Args:
+            method (str): The name of the method to call.
+            args (tuple): The positional arguments of the method.
+            kwargs (dict | None): The keyword arguments of the method.
+            bulk (bool): Wait for every shard without the per-query timeout.
+            require_all (bool): Raise instead of returning partial results.
+            shard_args (dict[str, tuple] | None): Positional arguments per collection name, replacing `args`.
+                Only these shards are called.
+
+        Returns:
+            tuple[dict[str, Any], bool]: The result of each shard that answered by collection name, and whether every called shard answered.
+
+        Raises:
+            RuntimeError: If no shard answered, or any shard did not answer and require_all is set.
+        """
+        calls = shard_args if shard_args is not None else dict.fromkeys(self.shards, args)
+        futures = {self.executor.submit(getattr(self.shards[name], method), *call_args, **(kwargs or {})): name
+                   for name, call_args in calls.items()}
+        done, not_done = wait(futures, timeout=None if bulk else self.timeout)
+        for future in not_done:
+            future.cancel()
+            logger.warning(f"Shard '{futures[future]}' timed out on {method}")
+        results = {}
+        for future in done:
+            if future.exception() is not None:
+                logger.warning(f"Shard '{futures[future]}' failed on {method}: {future.exception()}")
+            else:
+                results[futures[future]] = future.result()
+        complete = len(results) == len(futures)
+        if (futures and not results) or (require_all and not complete):
+            raise RuntimeError(f"{len(results)}/{len(futures)} shards answered {method}")
+        return results, complete
+
+    def _route(self, ids: list[str]) -> dict[str, list[str]]:
+        """
+        Group namespaced ids by shard, stripping the collection prefix. Ids of unknown shards are dropped.
+
+        Args:
+            ids (list[str]): The namespaced ids.
+
+        Returns:
+            dict[str, list[str]]: The ids local to each collection, by collection name.
+        """
+        routed = {}
+        for sharded_id in ids:
+            name, separator, item_id = sharded_id.partition(SHARD_SEPARATOR)
+            if separator and name in self.shards:
+                routed.setdefault(name, []).append(item_id)
+        return routed
+
+    def _encoder(self):
+        """The shard used to embed queries: the CLIP model is shared and runs locally, so any shard will do."""
+        return next(iter(self.shards.values()))
+
+    def embed_texts(self, texts: list[str]) -> list[np.ndarray]:
+        """Compute the CLIP embeddings of the given texts once, for all shards.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            list[np.ndarray]: One embedding per text, in the same order.
+        """
+        return self._encoder().embed_texts(texts)
+
+    def embed_images(self, images: list[np.ndarray]) -> list[np.ndarray]:
+        """Compute the CLIP embeddings of the given images once, for all shards.
+
+        Args:
+            images (list[np.ndarray]): The images as RGB pixel arrays.
+
+        Returns:
+            list[np.ndarray]: One embedding per image, in the same order.
+        """
+        return self._encoder().embed_images(images)
+
+    def embed(self, texts: list[str], images: list[np.ndarray]) -> list[np.ndarray]:
+        """Compute the CLIP embeddings of texts and images once for all shards, one batch per modality.
+
+        Args:
+            texts (list[str]): The texts to embed.
+            images (list[np.ndarray]): The images as RGB pixel arrays.
+
+        Returns:
+            list[np.ndarray]: One embedding per input, texts first then images.
+        """
+        return self._encoder().embed(texts, images)
+
+    def search_by_embeddings(self, embeddings: list[np.ndarray], n_results: int, ids: list[str] | None = None, bulk: bool = False) -> dict:
+        """Search every shard with the same query embeddings and merge their top-k by distance.
+
+        Args:
+            embeddings (list[np.ndarray]): The query embeddings.
+            n_results (int): The number of results to retrieve per embedding.
+            ids (list[str] | None): Restrict the search to these namespaced candidate ids; only their shards are searched.
+                Searches the whole collections if None.
+            bulk (bool): Offline search (e.g. index build): wait for every shard without the per-query timeout, and fail rather than return partial results.
+
+        Returns:
+            dict: response with one list of namespaced ids, metadatas and distances per embedding.
+        """
+        if ids is None:
+            shard_args = dict.fromkeys(self.shards, (embeddings, n_results))
+        else:
+            shard_args = {name: (embeddings, min(n_results, len(local_ids)), local_ids) for name, local_ids in self._route(ids).items()}
+        shard_results, _ = self._scatter("search_by_embeddings", bulk=bulk, require_all=bulk, shard_args=shard_args)
+        merged = {"ids": [], "metadatas": [], "distances": []}
+        for query in range(len(embeddings)):
+            candidates = [
+                (distance, shard_item_id(name, item_id), metadata)
+                for name, result in shard_results.items()
+                for item_id, metadata, distance in zip(result["ids"][query], result["metadatas"][query], result["distances"][query])
+            ]
+            best = heapq.nsmallest(n_results, candidates, key=lambda candidate: candidate[0])
+            merged["ids"].append([item_id for _, item_id, _ in best])
+            merged["metadatas"].append([metadata for _, _, metadata in best])
+            merged["distances"].append([distance for distance, _, _ in best])
+        return merged
+
+    def get_by_ids(self, ids: list[str], bulk: bool = False) -> dict:
+        """Fetch items by namespaced id from their shards, preserving the order of the given ids.
+
+        Args:
+            ids (list[str]): The namespaced ids of the items to fetch.
+            bulk (bool): Background fetch (e.g. index sync): wait for every shard without the per-query timeout.
+
+        Returns:
+            dict: response with the namespaced 'ids' and 'metadatas' of the items found.
+        """
+        shard_args = {name: (local_ids,) for name, local_ids in self._route(ids).items()}
+        results, _ = self._scatter("get_by_ids", bulk=bulk, shard_args=shard_args)
+        by_id = {}
+        for name, result in results.items():
+            by_id.update((shard_item_id(name, item_id), metadata) for item_id, metadata in zip(result["ids"], result["metadatas"]))
+        found = [item_id for item_id in ids if item_id in by_id]
+        return {"ids": found, "metadatas": [by_id[item_id] for item_id in found]}
+
+    def get_all_ids(self) -> tuple[list[str], bool]:
+        """Fetch the namespaced ids of every item in every shard.
+
+        Returns:
+            tuple[list[str], bool]: The ids of the items, and whether every shard answered.
+        """
+        results, complete = self._scatter("get_all_ids", bulk=True)
+        return [shard_item_id(name, item_id) for name, (shard_ids, _) in results.items() for item_id in shard_ids], complete
+
+    def iter_metadatas(self, batch_size: int = 500) -> Iterator[tuple[list[str], list[dict]]]:
+        """Stream the namespaced ids and metadata of every item, one page at a time, shard after shard.
+
+        Shards are read sequentially so that only one page is held in memory. A failing shard
+        raises rather than yielding a partial listing.
+
+        Args:
+            batch_size (int): The number of items to fetch per request.
+
+        Yields:
+            tuple[list[str], list[dict]]: The namespaced ids and metadata of the next page of items.
+        """
+        for name, shard in self.shards.items():
+            for shard_ids, shard_metadatas in shard.iter_metadatas(batch_size):
+                yield [shard_item_id(name, item_id) for item_id in shard_ids], shard_metadatas
@@ -0,0 +1,184 @@
+import bisect
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable, Optional
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalise a text query so that trivially different spellings share the same key.
+
+    Applies Unicode NFKC normalisation, case folding, punctuation removal and
+    whitespace collapsing.
+
+    Args:
+        query (str): The raw text query.
+
+    Returns:
+        str: The normalised query.
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = _NON_WORD.sub(" ", query)
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+@dataclass
+class SuggestionHit:
+    """Precomputed search for a single query phrase."""
+    phrase: str
+    embedding: np.ndarray
+    ids: list[str]
+    distances: list[float]
+
+
+class QuerySuggestionIndex:
+    """
+    Compact, read-only index of precomputed query embeddings and top-k results.
+
+    Keys are normalised query phrases kept in sorted order, so exact lookups and
+    prefix autocompletion are both answered with a binary search.
+    """
+
+    def __init__(self, keys: np.ndarray, phrases: np.ndarray, embeddings: np.ndarray, ids: np.ndarray, distances: np.ndarray):
+        """
+        Initialize the QuerySuggestionIndex object.
+
+        Args:
+            keys (np.ndarray): Sorted normalised query phrases, shape (n,).
+            phrases (np.ndarray): Original query phrases, shape (n,).
+            embeddings (np.ndarray): Query embeddings, shape (n, dim).
+            ids (np.ndarray): Top-k result ids padded with '', shape (n, k).
+            distances (np.ndarray): Top-k result distances, shape (n, k).
+        """
+        self.keys = keys.tolist()
+        self.phrases = phrases.tolist()
+        self.embeddings = embeddings
+        self.ids = ids
+        self.distances = distances
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def top_k(self) -> int:
+        """Number of results precomputed per phrase."""
+        return self.ids.shape[1]
+
+    def lookup(self, query: str) -> Optional[SuggestionHit]:
+        """
+        Find the precomputed search for a query after normalisation.
+
+        Args:
+            query (str): The text query.
+
+        Returns:
+            Optional[SuggestionHit]: The precomputed search, or None if the query is not indexed.
+        """
+        key = normalize_query(query)
+        pos = bisect.bisect_left(self.keys, key)
+        if pos == len(self.keys) or self.keys[pos] != key:
+            return None
+        row_ids = [item_id for item_id in self.ids[pos].tolist() if item_id]
+        return SuggestionHit(
+            phrase=self.phrases[pos],
+            embedding=self.embeddings[pos].astype(np.float32),
+            ids=row_ids,
+            distances=self.distances[pos, :len(row_ids)].tolist(),
+        )
+
+    def autocomplete(self, prefix: str, limit: int) -> list[str]:
+        """
+        Return indexed phrases whose normalised form starts with the given prefix.
+
+        Args:
+            prefix (str): The text typed so far.
+            limit (int): The maximum number of suggestions.
+
+        Returns:
+            list[str]: The matching phrases, in alphabetical order of their normalised form.
+        """
+        key = normalize_query(prefix)
+        if not key:
+            return []
+        suggestions = []
+        pos = bisect.bisect_left(self.keys, key)
+        while pos < len(self.keys) and len(suggestions) < limit and self.keys[pos].startswith(key):
+            suggestions.append(self.phrases[pos])
+            pos += 1
+        return suggestions
+
+    def save(self, path: str) -> None:
+        """
+        Save the index as a compressed .npz file.
+
+        Args:
+            path (str): The destination file path.
+        """
+        np.savez_compressed(path, keys=np.array(self.keys), phrases=np.array(self.phrases),
+                            embeddings=self.embeddings, ids=self.ids, distances=self.distances)
+        logger.info(f"Saved query suggestion index with {len(self)} phrases to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "QuerySuggestionIndex":
+        """
+        Load an index previously written by `save`.
+
+        Args:
+            path (str): The .npz file path.
+
+        Returns:
+            QuerySuggestionIndex: The loaded index.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            index = cls(data["keys"], data["phrases"], data["embeddings"], data["ids"], data["distances"])
+        logger.info(f"Loaded query suggestion index with {len(index)} phrases from {path}")
+        return index
+
+    @classmethod
+    def build(cls, chroma_db, phrases: Iterable[str], top_k: int, batch_size: int = 64) -> "QuerySuggestionIndex":
+        """
+        Embed every phrase and precompute its top-k results.
+
+        Phrases are consumed once and may be streamed; those that normalise to the same key
+        are indexed once, keeping the first spelling.
+
+        Args:
+            chroma_db (ChromaDatabase | ShardedChromaDatabase): The database to search.
+            phrases (Iterable[str]): The query phrases to index.
+            top_k (int): The number of results to precompute per phrase.
+            batch_size (int): The number of phrases embedded and searched per request.
+
+        Returns:
+            QuerySuggestionIndex: The built index.
+        """
+        unique = {}
+        for phrase in phrases:
+            key = normalize_query(phrase)
+            if key and key not in unique:
+                unique[key] = phrase.strip()
+        keys = sorted(unique)
+        if not keys:
+            raise ValueError("No phrases to index")
+
+        embeddings, ids, distances = [], [], []
+        for start in range(0, len(keys), batch_size):
+            batch = [unique[key] for key in keys[start:start + batch_size]]
+            batch_embeddings = chroma_db.embed_texts(batch)
+            result = chroma_db.search_by_embeddings(batch_embeddings, n_results=top_k, bulk=True)
+            for embedding, row_ids, row_distances in zip(batch_embeddings, result["ids"], result["distances"]):
+                padding = top_k - len(row_ids)
+                embeddings.append(np.asarray(embedding, dtype=np.float16))
+                ids.append(list(row_ids) + [""] * padding)
+                distances.append(list(row_distances) + [np.inf] * padding)
+            logger.info(f"Indexed {min(start + batch_size, len(keys))}/{len(keys)} phrases")
+
+        return cls(np.array(keys), np.array([unique[key] for key in keys]),
+                   np.stack(embeddings), np.array(ids), np.array(distances, dtype=np.float32))
@@ -34,22 +34,75 @@ def image_to_base64(image_path: str) -> str:
         base64_image = base64.b64encode(image_data).decode("utf-8")
     return base64_image
 
-def base64_to_ndarray(b64: str) -> np.ndarray:
+def base64_to_image(b64: str) -> Image.Image:
     """
-    Decode a base64-encoded string to a NumPy array.
+    Decode a base64-encoded string to an RGB PIL Image.
 
     Args:
         b64 (str): The base64-encoded string.
 
     Returns:
-        np.ndarray: The decoded NumPy array.
+        Image.Image: The decoded image.
     """
     img_bytes = base64.b64decode(b64)
 
     # Open image with Pillow
-    img = Image.open(io.BytesIO(img_bytes)).convert("RGB")  # ensure 3 channels
+    return Image.open(io.BytesIO(img_bytes)).convert("RGB")  # ensure 3 channels
+
+
+def base64_to_ndarray(b64: str) -> np.ndarray:
+    """
+    Decode a base64-encoded string to a NumPy array.
 
+    Args:
+        b64 (str): The base64-encoded string.
+
+    Returns:
+        np.ndarray: The decoded NumPy array.
+    """
     # Convert to NumPy array
-    img_array = np.array(img)
+    return np.array(base64_to_image(b64))
 
-    return img_array
+
+def image_to_dhash(img: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute the difference hash (dHash) of an image.
+
+    The image is shrunk with Pillow's fast integer reduction before the final resize,
+    so hashing an already decoded image is cheap. Near-identical images (re-uploads,
+    re-compressions) produce hashes within a small Hamming distance of each other.
+
+    Args:
+        img (Image.Image): The decoded image.
+        hash_size (int): The hash is hash_size * hash_size bits long.
+
+    Returns:
+        int: The perceptual hash of the image.
+    """
+    img = img.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+    # Compare each pixel with its right neighbour
+    pixels = np.asarray(img, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def parse_shards(spec: str) -> list[tuple[str, int, str]]:
+    """
+    Parse a shard list of the form 'host:port/collection,host:port/collection'.
+
+    Args:
+        spec (str): The comma-separated shard list.
+
+    Returns:
+        list[tuple[str, int, str]]: The (host, port, collection_name) of each shard.
+    """
+    shards = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        address, collection_name = entry.split("/", 1)
+        host, port = address.rsplit(":", 1)
+        shards.append((host, int(port), collection_name))
+    return shards
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Import the package from the source tree without installing it
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
@@ -0,0 +1,69 @@
+import io
+import numpy as np
+from PIL import Image, ImageDraw
+from mcp_server.cache import PerceptualHashCache
+from mcp_server.utils import image_to_dhash
+
+# Default IMAGE_CACHE_MAX_DISTANCE of the MCP Server
+MAX_DISTANCE = 4
+
+
+def put(cache: PerceptualHashCache, image_hash: int, item_id: str) -> None:
+    cache.put(image_hash, np.zeros(4, dtype=np.float32), [item_id], [{"name": item_id}])
+
+
+def test_exact_and_near_matches():
+    cache = PerceptualHashCache(max_entries=4, max_distance=2)
+    put(cache, 0b1111_0000, "a")
+    assert cache.get(0b1111_0000).ids == ["a"]
+    assert cache.get(0b1111_0011).ids == ["a"]  # 2 bits away
+    assert cache.get(0b1111_0111) is None  # 3 bits away
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_closest_hash_wins():
+    cache = PerceptualHashCache(max_entries=4, max_distance=3)
+    put(cache, 0b0000, "a")
+    put(cache, 0b0111, "b")
+    assert cache.get(0b0011).ids == ["b"]
+    assert cache.get(0b0001).ids == ["a"]
+
+
+def test_least_recently_used_is_evicted():
+    cache = PerceptualHashCache(max_entries=2, max_distance=0)
+    put(cache, 1, "a")
+    put(cache, 2, "b")
+    cache.get(1)
+    put(cache, 3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1).ids == ["a"]
+    assert cache.get(3).ids == ["c"]
+
+
+def scene(seed: int) -> Image.Image:
+    """A synthetic photo-like image: coloured ellipses on a white background."""
+    rng = np.random.default_rng(seed)
+    image = Image.new("RGB", (320, 240), "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.integers(0, 280), rng.integers(0, 200)
+        width, height = rng.integers(20, 120, 2)
+        draw.ellipse((x, y, x + width, y + height), fill=tuple(int(channel) for channel in rng.integers(0, 256, 3)))
+    return image
+
+
+def jpeg(image: Image.Image, quality: int) -> Image.Image:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return Image.open(io.BytesIO(buffer.getvalue()))
+
+
+def test_dhash_matches_recompressed_and_resized_copies_only():
+    cache = PerceptualHashCache(max_entries=4, max_distance=MAX_DISTANCE)
+    original = scene(1)
+    put(cache, image_to_dhash(jpeg(original, 95)), "original")
+
+    assert cache.get(image_to_dhash(jpeg(original, 40))).ids == ["original"]
+    assert cache.get(image_to_dhash(jpeg(original.resize((160, 120)), 75))).ids == ["original"]
+    assert cache.get(image_to_dhash(jpeg(original, 95).resize((640, 480)))).ids == ["original"]
+    assert cache.get(image_to_dhash(jpeg(scene(2), 95))) is None
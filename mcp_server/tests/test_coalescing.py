@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import pytest
+from mcp_server.coalescing import SingleFlight
+
+
+def test_identical_concurrent_calls_share_one_computation():
+    calls = []
+    release = threading.Event()
+
+    def compute(value):
+        calls.append(value)
+        release.wait(timeout=5)
+        return value * 2
+
+    async def main():
+        single_flight = SingleFlight()
+        tasks = [asyncio.create_task(single_flight.run("key", compute, 21)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return single_flight, await asyncio.gather(*tasks)
+
+    single_flight, results = asyncio.run(main())
+    assert results == [42, 42, 42]
+    assert calls == [21]
+    assert single_flight.stats() == {"executed": 1, "coalesced": 2, "in_flight": 0}
+
+
+def test_different_keys_run_separately():
+    async def main():
+        single_flight = SingleFlight()
+        results = await asyncio.gather(single_flight.run("a", str.upper, "a"), single_flight.run("b", str.upper, "b"))
+        return single_flight, results
+
+    single_flight, results = asyncio.run(main())
+    assert results == ["A", "B"]
+    assert single_flight.stats()["executed"] == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    release = threading.Event()
+
+    def compute():
+        release.wait(timeout=5)
+        return "done"
+
+    async def main():
+        single_flight = SingleFlight()
+        first = asyncio.create_task(single_flight.run("key", compute))
+        second = asyncio.create_task(single_flight.run("key", compute))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return single_flight, await second
+
+    single_flight, result = asyncio.run(main())
+    assert result == "done"
+    assert single_flight.stats()["in_flight"] == 0
+
+
+def test_errors_are_shared_and_not_cached():
+    def fail():
+        raise ValueError("boom")
+
+    async def main():
+        single_flight = SingleFlight()
+        with pytest.raises(ValueError):
+            await single_flight.run("key", fail)
+        return await single_flight.run("key", str, 1)
+
+    assert asyncio.run(main()) == "1"
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+torch = pytest.importorskip("torch")
+open_clip = pytest.importorskip("open_clip")
+from chromadb.utils.embedding_functions import OpenCLIPEmbeddingFunction
+from mcp_server.db import check_clip_internals, clip_embed
+
+
+@pytest.fixture(scope="module")
+def embedding_function() -> OpenCLIPEmbeddingFunction:
+    """The installed chromadb's own OpenCLIPEmbeddingFunction, with random weights to avoid downloading the checkpoint."""
+    create_model_and_transforms = open_clip.create_model_and_transforms
+    open_clip.create_model_and_transforms = lambda model_name, pretrained=None, **kwargs: create_model_and_transforms(model_name, pretrained=None, **kwargs)
+    try:
+        torch.manual_seed(0)
+        return OpenCLIPEmbeddingFunction(device="cpu")
+    finally:
+        open_clip.create_model_and_transforms = create_model_and_transforms
+
+
+def test_installed_chromadb_exposes_clip_internals(embedding_function):
+    check_clip_internals(embedding_function)
+
+
+def test_missing_clip_internals_fail_loudly():
+    class Upgraded:
+        _model = None
+
+    with pytest.raises(RuntimeError, match="_tokenizer, _preprocess"):
+        check_clip_internals(Upgraded())
+
+
+def test_clip_embed_matches_embedding_function(embedding_function):
+    embedding_function._model.eval()
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (32, 48, 3), dtype=np.uint8) for _ in range(2)]
+    texts = ["a red car", "a dog on the beach"]
+
+    embeddings = clip_embed(embedding_function, texts, images)
+
+    expected = embedding_function(texts) + embedding_function(images)
+    assert len(embeddings) == len(expected)
+    for embedding, reference in zip(embeddings, expected):
+        np.testing.assert_allclose(embedding, reference, atol=1e-5)
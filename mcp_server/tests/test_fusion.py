@@ -0,0 +1,20 @@
+from mcp_server.fusion import reciprocal_rank_fusion
+
+
+def test_rrf_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]])
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d"}
+    assert fused[-1] == "d"
+
+
+def test_rrf_scores():
+    fused = reciprocal_rank_fusion([["a"], ["b", "a"]], k=1)
+    # a: 1/2 + 1/3, b: 1/2
+    assert fused == ["a", "b"]
+
+
+def test_rrf_weights():
+    assert reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0, 2.0]) == ["b", "a"]
+    assert reciprocal_rank_fusion([]) == []
+
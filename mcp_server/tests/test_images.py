@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import io
+import os
+import threading
+import pytest
+from PIL import Image
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from mcp_server.images import ImageStore, detect_media_type, image_response
+
+
+def encode(image_format: str, color: str = "red") -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path) -> ImageStore:
+    return ImageStore(str(tmp_path / "images"), "http://localhost:9000/")
+
+
+@pytest.fixture
+def client(store) -> TestClient:
+    async def endpoint(request: Request):
+        return image_response(store, request.path_params["image_hash"], request.headers.get("if-none-match"))
+    return TestClient(Starlette(routes=[Route("/images/{image_hash}", endpoint, methods=["GET", "HEAD"])]))
+
+
+@pytest.mark.parametrize("image_format, media_type", [
+    ("JPEG", "image/jpeg"), ("PNG", "image/png"), ("WEBP", "image/webp"), ("GIF", "image/gif")])
+def test_detect_media_type(image_format, media_type):
+    assert detect_media_type(encode(image_format)[:12]) == media_type
+
+
+def test_detect_media_type_unknown():
+    assert detect_media_type(b"not an image") == "application/octet-stream"
+
+
+def test_ensure_stores_images_by_content_hash(store):
+    data = encode("PNG")
+    image_hash = store.ensure(base64.b64encode(data).decode())
+    assert image_hash == hashlib.sha256(data).hexdigest()
+    assert store.url(image_hash) == f"http://localhost:9000/images/{image_hash}"
+    with open(store.path(image_hash), "rb") as image_file:
+        assert image_file.read() == data
+    assert store.ensure(base64.b64encode(encode("PNG", "blue")).decode()) != image_hash
+
+
+def test_ensure_is_atomic_under_concurrency(store):
+    data = encode("JPEG")
+    payload = base64.b64encode(data).decode()
+    hashes = []
+    threads = [threading.Thread(target=lambda: hashes.append(store.ensure(payload))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(hashes)) == 1
+    # Only the final file, no leftover temporary files
+    assert os.listdir(store.directory) == [hashes[0]]
+    with open(store.path(hashes[0]), "rb") as image_file:
+        assert image_file.read() == data
+
+
+@pytest.mark.parametrize("image_hash", ["../secret", "/etc/passwd", "a" * 63, "A" * 64, "a" * 64 + "/.."])
+def test_path_rejects_anything_but_a_digest(store, image_hash):
+    with pytest.raises(ValueError):
+        store.path(image_hash)
+
+
+def test_path_stays_in_the_store(store):
+    path = store.path("a" * 64)
+    assert os.path.dirname(os.path.abspath(path)) == os.path.abspath(store.directory)
+
+
+def test_endpoint_serves_the_image_with_caching_headers(store, client):
+    data = encode("JPEG")
+    image_hash = store.ensure(base64.b64encode(data).decode())
+    response = client.get(f"/images/{image_hash}")
+    assert response.status_code == 200
+    assert response.content == data
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["etag"] == f'"{image_hash}"'
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_endpoint_not_modified(store, client):
+    image_hash = store.ensure(base64.b64encode(encode("PNG")).decode())
+    response = client.get(f"/images/{image_hash}", headers={"If-None-Match": f'W/"other", "{image_hash}"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert client.get(f"/images/{image_hash}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_endpoint_range(store, client):
+    data = encode("PNG")
+    image_hash = store.ensure(base64.b64encode(data).decode())
+    response = client.get(f"/images/{image_hash}", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.content == data[:10]
+    assert response.headers["content-range"] == f"bytes 0-9/{len(data)}"
+
+
+def test_endpoint_not_found(client):
+    assert client.get(f"/images/{'0' * 64}").status_code == 404
+    assert client.get("/images/not-a-hash").status_code == 404
@@ -0,0 +1,114 @@
+import pytest
+from mcp_server.lexical import BM25Index, tokenize
+
+PRODUCTS = {
+    "1": {"name": "Trail Running Shoes", "description": "Lightweight shoes for trail running", "category": "Running"},
+    "2": {"name": "Leather Boots", "description": "Waterproof leather boots", "category": "Boots"},
+    "3": {"name": "Road Running Shoes", "description": "Cushioned shoes", "category": "Running"},
+}
+
+
+class FakeDatabase:
+    """Stand-in for ChromaDatabase exposing the methods used to sync the index."""
+
+    def __init__(self, items: dict, complete: bool = True, fail_after: int | None = None):
+        self.items = items
+        self.complete = complete
+        self.fail_after = fail_after
+        self.pages = []
+
+    def get_all_ids(self):
+        return list(self.items), self.complete
+
+    def get_by_ids(self, ids, bulk=False):
+        found = [item_id for item_id in ids if item_id in self.items]
+        return {"ids": found, "metadatas": [self.items[item_id] for item_id in found]}
+
+    def iter_metadatas(self, batch_size=500):
+        ids = list(self.items)
+        for start in range(0, len(ids), batch_size):
+            if self.fail_after is not None and len(self.pages) == self.fail_after:
+                raise ConnectionError("collection unavailable")
+            page = ids[start:start + batch_size]
+            self.pages.append(page)
+            yield page, [self.items[item_id] for item_id in page]
+
+
+def make_index() -> BM25Index:
+    index = BM25Index()
+    for doc_id, metadata in PRODUCTS.items():
+        index.add(doc_id, metadata)
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Trail-Running SHOES") == ["trail", "running", "shoes"]
+
+
+def test_search_ranks_matching_documents():
+    results = make_index().search("trail running", limit=10)
+    assert [doc_id for doc_id, _ in results] == ["1", "3"]
+    assert results[0][1] > results[1][1]
+
+
+def test_search_limit_and_no_match():
+    index = make_index()
+    assert len(index.search("shoes", limit=1)) == 1
+    assert index.search("sandals", limit=10) == []
+
+
+def test_add_unchanged_document_is_a_no_op():
+    index = make_index()
+    assert not index.add("2", dict(PRODUCTS["2"]))
+    assert index.add("2", {**PRODUCTS["2"], "name": "Suede Boots"})
+    assert [doc_id for doc_id, _ in index.search("suede", limit=10)] == ["2"]
+    assert index.search("leather boots", limit=10)[0][0] == "2"
+
+
+def test_remove():
+    index = make_index()
+    index.remove("1")
+    index.remove("unknown")
+    assert "1" not in index
+    assert len(index) == 2
+    assert index.search("trail", limit=10) == []
+
+
+def test_sync_adds_and_deletes():
+    index = make_index()
+    items = {doc_id: metadata for doc_id, metadata in PRODUCTS.items() if doc_id != "2"}
+    items["4"] = {"name": "Canvas Sneakers", "description": "", "category": "Sneakers"}
+    index.sync(FakeDatabase(items))
+    assert sorted(index._doc_terms) == ["1", "3", "4"]
+    assert index.search("sneakers", limit=10)[0][0] == "4"
+
+
+def test_sync_keeps_documents_when_listing_is_partial():
+    index = make_index()
+    index.sync(FakeDatabase({"1": PRODUCTS["1"]}, complete=False))
+    assert len(index) == 3
+
+
+def test_full_sync_reindexes_edited_documents():
+    index = make_index()
+    items = {**PRODUCTS, "3": {**PRODUCTS["3"], "description": "Cushioned marathon shoes"}}
+    del items["2"]
+    index.full_sync(FakeDatabase(items))
+    assert "2" not in index
+    assert [doc_id for doc_id, _ in index.search("marathon", limit=10)] == ["3"]
+
+
+def test_full_sync_streams_pages():
+    index = BM25Index()
+    db = FakeDatabase(PRODUCTS)
+    index.full_sync(db, batch_size=2)
+    assert db.pages == [["1", "2"], ["3"]]
+    assert len(index) == 3
+
+
+def test_full_sync_failure_midway_removes_nothing():
+    index = make_index()
+    db = FakeDatabase({"1": PRODUCTS["1"], "4": {"name": "Canvas Sneakers", "description": "", "category": "Sneakers"}}, fail_after=1)
+    with pytest.raises(ConnectionError):
+        index.full_sync(db, batch_size=1)
+    assert sorted(index._doc_terms) == ["1", "2", "3"]
@@ -0,0 +1,76 @@
+import base64
+import json
+import logging
+import queue
+import sys
+import pytest
+from mcp_server import logging_config
+from mcp_server.logging_config import (MAX_LOGGED_STRING_LENGTH, DeferredFormattingQueueHandler, JsonFormatter,
+                                       RequestSampler, start_request_sampling, summarize_payload)
+
+
+def make_record(level: int, message: str = "hello %s", args: tuple = ("world",), exc_info=None) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, message, args, exc_info)
+
+
+@pytest.fixture
+def sample_rate(monkeypatch):
+    def set_rate(rate: float):
+        monkeypatch.setattr(logging_config, "_sample_rate", rate)
+    yield set_rate
+    logging_config._request_sampled.set(True)
+
+
+def test_summarize_payload_replaces_base64_images_and_lists_with_their_size():
+    image = base64.b64encode(bytes(1000)).decode()
+    payload = {"image_base64": image, "text_query": "a red car", "images": ["x", "y", "z"], "top_k": 5}
+
+    assert summarize_payload(payload) == {
+        "image_base64": f"<str len={len(image)}>",
+        "text_query": "a red car",
+        "images": "<list len=3>",
+        "top_k": 5,
+    }
+
+
+def test_summarize_payload_keeps_strings_up_to_the_limit():
+    short = "a" * MAX_LOGGED_STRING_LENGTH
+    assert summarize_payload(short) == short
+    assert summarize_payload(short + "a") == f"<str len={MAX_LOGGED_STRING_LENGTH + 1}>"
+
+
+def test_unsampled_request_drops_info_but_keeps_warnings(sample_rate):
+    sample_rate(0.0)
+    assert start_request_sampling() is False
+
+    sampler = RequestSampler()
+    assert not sampler.filter(make_record(logging.INFO))
+    assert sampler.filter(make_record(logging.WARNING))
+    assert sampler.filter(make_record(logging.ERROR))
+
+
+def test_sampled_request_keeps_info(sample_rate):
+    sample_rate(1.0)
+    assert start_request_sampling() is True
+    assert RequestSampler().filter(make_record(logging.INFO))
+
+
+def test_deferred_queue_handler_keeps_args_and_exc_info_for_json_formatter():
+    log_queue = queue.SimpleQueue()
+    handler = DeferredFormattingQueueHandler(log_queue)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record(logging.ERROR, exc_info=sys.exc_info())
+    record.fields = {"tool": "hybrid_search_tool"}
+
+    handler.handle(record)
+    queued = log_queue.get_nowait()
+
+    assert queued.args == ("world",)
+    assert queued.exc_info is not None
+    entry = json.loads(JsonFormatter().format(queued))
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "ERROR"
+    assert entry["tool"] == "hybrid_search_tool"
+    assert "ValueError: boom" in entry["exception"]
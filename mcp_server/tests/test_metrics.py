@@ -0,0 +1,44 @@
+import threading
+import pytest
+
+pytest.importorskip("prometheus_client")
+from prometheus_client import REGISTRY
+from mcp_server.metrics import SERVICE, InstrumentedThreadPoolExecutor
+
+
+def gauge(name: str, pool: str) -> float:
+    return REGISTRY.get_sample_value(name, {"service": SERVICE, "pool": pool})
+
+
+def test_pool_gauges_track_busy_and_queued_tasks():
+    executor = InstrumentedThreadPoolExecutor("test_pool", max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(timeout=5)
+        return "done"
+
+    running = executor.submit(block)
+    started.wait(timeout=5)
+    queued = executor.submit(str, 1)
+    cancelled = executor.submit(str, 2)
+    assert gauge("worker_pool_size", "test_pool") == 1
+    assert gauge("worker_pool_busy", "test_pool") == 1
+    assert gauge("worker_pool_queued", "test_pool") == 2
+
+    assert cancelled.cancel()
+    assert gauge("worker_pool_queued", "test_pool") == 1
+    release.set()
+    assert running.result() == "done"
+    assert queued.result() == "1"
+    executor.shutdown(wait=True)
+    assert gauge("worker_pool_busy", "test_pool") == 0
+    assert gauge("worker_pool_queued", "test_pool") == 0
+
+
+def test_map_goes_through_the_gauges():
+    with InstrumentedThreadPoolExecutor("test_map", max_workers=2) as executor:
+        assert list(executor.map(abs, [-1, -2, 3])) == [1, 2, 3]
+    assert gauge("worker_pool_busy", "test_map") == 0
+    assert gauge("worker_pool_queued", "test_map") == 0
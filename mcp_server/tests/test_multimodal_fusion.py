@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from mcp_server.fusion import multimodal_search, validate_fusion_query, weighted_average_embedding
+
+TEXT = np.array([1.0, 0.0, 0.0])
+IMAGE = np.array([0.0, 1.0, 0.0])
+
+
+class FakeDatabase:
+    """Stand-in for ChromaDatabase: fixed embeddings per modality and a fixed ranking per query embedding."""
+
+    def __init__(self, rankings: dict[tuple, list[str]] | None = None):
+        self.rankings = rankings or {}
+        self.embed_calls = []
+        self.queries = []
+
+    def embed(self, texts, images):
+        self.embed_calls.append((list(texts), len(images)))
+        return [TEXT for _ in texts] + [IMAGE for _ in images]
+
+    def search_by_embeddings(self, embeddings, n_results, ids=None, bulk=False):
+        self.queries.append([np.asarray(embedding) for embedding in embeddings])
+        rankings = [self.rankings.get(tuple(np.round(embedding, 3)), ["fused"])[:n_results] for embedding in embeddings]
+        return {
+            "ids": rankings,
+            "metadatas": [[{"name": item_id} for item_id in ranking] for ranking in rankings],
+            "distances": [[0.0] * len(ranking) for ranking in rankings],
+        }
+
+
+def test_validate_fusion_query():
+    validate_fusion_query(1, 1, "rrf", [0.5, 0.5])
+    validate_fusion_query(0, 2, "embedding", None)
+
+
+@pytest.mark.parametrize("text_count, image_count, mode, weights", [
+    (0, 0, "embedding", None),
+    (1, 1, "embedding", [1.0]),
+    (1, 0, "embedding", [1.0, 1.0]),
+    (1, 1, "average", None),
+])
+def test_validate_fusion_query_rejects(text_count, image_count, mode, weights):
+    with pytest.raises(ValueError):
+        validate_fusion_query(text_count, image_count, mode, weights)
+
+
+def test_embedding_mode_embeds_texts_then_images_and_searches_once():
+    db = FakeDatabase()
+    ids, metadatas = multimodal_search(db, ["boots"], [np.zeros((4, 4, 3), dtype=np.uint8)], top_k=1, mode="embedding", weights=[3.0, 1.0])
+    assert db.embed_calls == [(["boots"], 1)]
+    assert len(db.queries) == 1 and len(db.queries[0]) == 1
+    # The text weight applies to the text embedding, which comes first
+    np.testing.assert_allclose(db.queries[0][0], weighted_average_embedding([TEXT, IMAGE], [3.0, 1.0]), rtol=1e-6)
+    assert db.queries[0][0][0] > db.queries[0][0][1]
+    assert (ids, metadatas) == (["fused"], [{"name": "fused"}])
+
+
+def test_rrf_mode_searches_each_query_and_fuses_the_rankings():
+    db = FakeDatabase({tuple(TEXT): ["a", "b", "c"], tuple(IMAGE): ["c", "a", "d"]})
+    ids, metadatas = multimodal_search(db, ["boots"], [np.zeros((4, 4, 3), dtype=np.uint8)], top_k=2, mode="rrf")
+    assert len(db.queries[0]) == 2
+    assert ids == ["a", "c"]
+    assert metadatas == [{"name": "a"}, {"name": "c"}]
+
+
+def test_rrf_mode_weights_follow_text_then_image_order():
+    db = FakeDatabase({tuple(TEXT): ["a", "b"], tuple(IMAGE): ["b", "a"]})
+    images = [np.zeros((4, 4, 3), dtype=np.uint8)]
+    assert multimodal_search(db, ["boots"], images, top_k=1, mode="rrf", weights=[1.0, 3.0])[0] == ["b"]
+    assert multimodal_search(db, ["boots"], images, top_k=1, mode="rrf", weights=[3.0, 1.0])[0] == ["a"]
+
+
+def test_stages_are_timed():
+    stages = []
+
+    class Stage:
+        def __init__(self, name):
+            stages.append(name)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+    multimodal_search(FakeDatabase(), ["boots"], [], top_k=1, mode="embedding", stage=Stage)
+    assert stages == ["embed", "vector_query"]
+
+
+def test_weighted_average_embedding_is_normalised():
+    fused = weighted_average_embedding([np.array([2.0, 0.0]), np.array([0.0, 10.0])])
+    np.testing.assert_allclose(fused, [np.sqrt(0.5), np.sqrt(0.5)], rtol=1e-6)
+
+
+def test_weighted_average_embedding_weights():
+    fused = weighted_average_embedding([np.array([1.0, 0.0]), np.array([0.0, 1.0])], weights=[3.0, 1.0])
+    assert fused[0] > fused[1]
+    np.testing.assert_allclose(np.linalg.norm(fused), 1.0, rtol=1e-6)
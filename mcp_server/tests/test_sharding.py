@@ -0,0 +1,158 @@
+from types import SimpleNamespace
+import time
+import numpy as np
+import pytest
+from mcp_server.sharding import ShardedChromaDatabase
+from mcp_server.utils import parse_shards
+
+
+def test_parse_shards():
+    assert parse_shards("localhost:8000/men_shoes, chroma-2:8001/women_shoes,") == [
+        ("localhost", 8000, "men_shoes"),
+        ("chroma-2", 8001, "women_shoes"),
+    ]
+
+
+def test_parse_shards_collection_may_contain_slashes():
+    assert parse_shards("[::1]:8000/a/b") == [("[::1]", 8000, "a/b")]
+
+
+def test_parse_shards_empty():
+    assert parse_shards("") == []
+
+
+class FakeShard:
+    """Stand-in for a ChromaDatabase holding one collection, with ids numbered from '0' like the real ones."""
+
+    def __init__(self, name: str, items: dict, distances: dict | None = None, delay: float = 0.0, error: Exception | None = None):
+        self.collection = SimpleNamespace(name=name)
+        self.items = items
+        self.distances = distances or {}
+        self.delay = delay
+        self.error = error
+        self.calls = []
+
+    def _answer(self, method, *args):
+        self.calls.append((method, args))
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+
+    def embed_texts(self, texts):
+        return [np.ones(2) for _ in texts]
+
+    def search_by_embeddings(self, embeddings, n_results, ids=None, bulk=False):
+        self._answer("search_by_embeddings", n_results, ids)
+        candidates = sorted((distance, item_id) for item_id, distance in self.distances.items() if ids is None or item_id in ids)[:n_results]
+        return {
+            "ids": [[item_id for _, item_id in candidates] for _ in embeddings],
+            "metadatas": [[self.items[item_id] for _, item_id in candidates] for _ in embeddings],
+            "distances": [[distance for distance, _ in candidates] for _ in embeddings],
+        }
+
+    def get_by_ids(self, ids, bulk=False):
+        self._answer("get_by_ids", ids)
+        found = [item_id for item_id in ids if item_id in self.items]
+        return {"ids": found, "metadatas": [self.items[item_id] for item_id in found]}
+
+    def get_all_ids(self):
+        self._answer("get_all_ids")
+        return list(self.items), True
+
+    def iter_metadatas(self, batch_size=500):
+        self._answer("iter_metadatas")
+        ids = list(self.items)
+        for start in range(0, len(ids), batch_size):
+            yield ids[start:start + batch_size], [self.items[item_id] for item_id in ids[start:start + batch_size]]
+
+
+def make_shards(**overrides) -> tuple[FakeShard, FakeShard]:
+    men = FakeShard("men", {"0": {"name": "Boots"}, "1": {"name": "Loafers"}}, {"0": 0.1, "1": 0.4})
+    women = FakeShard("women", {"0": {"name": "Heels"}, "1": {"name": "Sandals"}}, {"0": 0.2, "1": 0.3})
+    for name, value in overrides.items():
+        setattr(women, name, value)
+    return men, women
+
+
+def test_duplicate_collection_names_are_rejected():
+    with pytest.raises(ValueError):
+        ShardedChromaDatabase([FakeShard("men", {}), FakeShard("men", {})], timeout=1.0)
+
+
+def test_search_merges_shards_by_distance_with_namespaced_ids():
+    db = ShardedChromaDatabase(list(make_shards()), timeout=1.0)
+    result = db.search_by_embeddings([np.ones(2)], n_results=3)
+    assert result["ids"] == [["men/0", "women/0", "women/1"]]
+    assert result["distances"] == [[0.1, 0.2, 0.3]]
+    assert [metadata["name"] for metadata in result["metadatas"][0]] == ["Boots", "Heels", "Sandals"]
+
+
+def test_search_restricted_to_ids_only_queries_their_shards():
+    men, women = make_shards()
+    db = ShardedChromaDatabase([men, women], timeout=1.0)
+    result = db.search_by_embeddings([np.ones(2)], n_results=5, ids=["women/1", "unknown/0", "0"])
+    assert result["ids"] == [["women/1"]]
+    assert men.calls == []
+    assert women.calls == [("search_by_embeddings", (1, ["1"]))]
+
+
+def test_get_by_ids_routes_colliding_ids_to_their_shard():
+    db = ShardedChromaDatabase(list(make_shards()), timeout=1.0)
+    result = db.get_by_ids(["women/0", "men/0", "men/9"])
+    assert result["ids"] == ["women/0", "men/0"]
+    assert [metadata["name"] for metadata in result["metadatas"]] == ["Heels", "Boots"]
+
+
+def test_failing_shard_is_skipped():
+    db = ShardedChromaDatabase(list(make_shards(error=ConnectionError("down"))), timeout=1.0)
+    result = db.search_by_embeddings([np.ones(2)], n_results=3)
+    assert result["ids"] == [["men/0", "men/1"]]
+
+
+def test_slow_shard_returns_partial_results_after_the_timeout():
+    db = ShardedChromaDatabase(list(make_shards(delay=0.5)), timeout=0.05)
+    start = time.monotonic()
+    result = db.search_by_embeddings([np.ones(2)], n_results=3)
+    assert time.monotonic() - start < 0.4
+    assert result["ids"] == [["men/0", "men/1"]]
+
+
+def test_every_shard_failing_raises():
+    shards = [FakeShard("men", {}, error=ConnectionError("down")), FakeShard("women", {}, error=ConnectionError("down"))]
+    with pytest.raises(RuntimeError):
+        ShardedChromaDatabase(shards, timeout=1.0).search_by_embeddings([np.ones(2)], n_results=3)
+
+
+def test_bulk_calls_wait_past_the_timeout():
+    db = ShardedChromaDatabase(list(make_shards(delay=0.2)), timeout=0.05)
+    ids, complete = db.get_all_ids()
+    assert complete
+    assert sorted(ids) == ["men/0", "men/1", "women/0", "women/1"]
+    assert db.get_by_ids(["women/1"], bulk=True)["ids"] == ["women/1"]
+    assert len(db.search_by_embeddings([np.ones(2)], n_results=4, bulk=True)["ids"][0]) == 4
+
+
+def test_partial_id_listing_is_reported():
+    db = ShardedChromaDatabase(list(make_shards(error=ConnectionError("down"))), timeout=1.0)
+    ids, complete = db.get_all_ids()
+    assert not complete
+    assert sorted(ids) == ["men/0", "men/1"]
+
+
+def test_require_all_raises_on_partial_results():
+    db = ShardedChromaDatabase(list(make_shards(error=ConnectionError("down"))), timeout=1.0)
+    with pytest.raises(RuntimeError):
+        db.search_by_embeddings([np.ones(2)], n_results=3, bulk=True)
+
+
+def test_iter_metadatas_streams_namespaced_pages_shard_by_shard():
+    db = ShardedChromaDatabase(list(make_shards()), timeout=1.0)
+    pages = list(db.iter_metadatas(batch_size=1))
+    assert [ids for ids, _ in pages] == [["men/0"], ["men/1"], ["women/0"], ["women/1"]]
+    assert [metadatas[0]["name"] for _, metadatas in pages] == ["Boots", "Loafers", "Heels", "Sandals"]
+
+
+def test_iter_metadatas_raises_on_failing_shard():
+    db = ShardedChromaDatabase(list(make_shards(error=ConnectionError("down"))), timeout=1.0)
+    with pytest.raises(ConnectionError):
+        list(db.iter_metadatas())
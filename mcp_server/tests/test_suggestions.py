@@ -0,0 +1,52 @@
+import numpy as np
+from mcp_server.suggestions import QuerySuggestionIndex, normalize_query
+
+
+def make_index() -> QuerySuggestionIndex:
+    phrases = ["Running Shoes", "running socks", "Boots", "Red boots"]
+    keys = [normalize_query(phrase) for phrase in phrases]
+    order = np.argsort(keys)
+    embeddings = np.eye(len(phrases), 4, dtype=np.float16)
+    ids = np.array([["a", "b"], ["c", ""], ["d", "e"], ["f", ""]])
+    distances = np.array([[0.1, 0.2], [0.3, np.inf], [0.4, 0.5], [0.6, np.inf]], dtype=np.float32)
+    return QuerySuggestionIndex(np.array(keys)[order], np.array(phrases)[order], embeddings[order], ids[order], distances[order])
+
+
+def test_normalize_query():
+    assert normalize_query("  Running   SHOES!! ") == "running shoes"
+
+
+def test_lookup_normalises_the_query():
+    hit = make_index().lookup("running, shoes")
+    assert hit.phrase == "Running Shoes"
+    assert hit.ids == ["a", "b"]
+    assert hit.distances == [np.float32(0.1), np.float32(0.2)]
+    assert hit.embedding.dtype == np.float32
+
+
+def test_lookup_strips_padding():
+    hit = make_index().lookup("running socks")
+    assert hit.ids == ["c"]
+    assert len(hit.distances) == 1
+
+
+def test_lookup_miss():
+    assert make_index().lookup("sandals") is None
+    assert make_index().lookup("running") is None
+
+
+def test_autocomplete():
+    index = make_index()
+    assert index.autocomplete("RUN", limit=5) == ["Running Shoes", "running socks"]
+    assert index.autocomplete("run", limit=1) == ["Running Shoes"]
+    assert index.autocomplete("b", limit=5) == ["Boots"]
+    assert index.autocomplete("  ", limit=5) == []
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "index.npz")
+    make_index().save(path)
+    index = QuerySuggestionIndex.load(path)
+    assert len(index) == 4
+    assert index.top_k == 2
+    assert index.lookup("red boots").ids == ["f"]